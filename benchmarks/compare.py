@@ -0,0 +1,64 @@
+"""Compare two benchmark JSON files and flag regressions.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.2
+
+Cases are matched by (scenario, case, notes) and compared on their best
+time. Exits with status 1 if any case got slower by more than threshold.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+CaseKey = Tuple[str, str, int]
+
+
+def load_results(path: str) -> Dict[CaseKey, Dict[str, Any]]:
+    """Results of a benchmark file keyed by (scenario, case, notes)."""
+    with open(path) as f:
+        document = json.load(f)
+    return {
+        (result["scenario"], result["case"], result["notes"]): result
+        for result in document["results"]
+    }
+
+
+def compare(
+    baseline: Dict[CaseKey, Dict[str, Any]],
+    current: Dict[CaseKey, Dict[str, Any]],
+    threshold: float = 0.2
+) -> List[Tuple[CaseKey, float, float, bool]]:
+    """Return (case, baseline best, current best, regressed) for shared cases."""
+    rows = []
+    for key in sorted(baseline.keys() & current.keys()):
+        before = baseline[key]["best"]
+        after = current[key]["best"]
+        rows.append((key, before, after, after > before * (1 + threshold)))
+    return rows
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Print a comparison table; return 1 if anything regressed."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2,
+        help="allowed slowdown as a fraction (default: %(default)s)"
+    )
+    args = parser.parse_args(argv)
+
+    rows = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    for (scenario, case, notes), before, after, regressed in rows:
+        change = (after - before) / before * 100 if before else 0.0
+        flag = "  REGRESSION" if regressed else ""
+        print(
+            f"{scenario:<12} {case:<32} {notes:>9} "
+            f"{before * 1000:>10.2f} ms {after * 1000:>10.2f} ms {change:>+7.1f}%{flag}"
+        )
+    return 1 if any(regressed for *_, regressed in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Deterministic synthetic note corpora.
+
+Notes look like what the editor saves: Qt rich text documents (headings,
+paragraphs, checklists, highlighted spans) stored in the compact canonical
+form, with short titles and a handful of folders. The same seed and count
+always produce the same corpus.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Sequence
+from src.aurora_notes.utils.html_canonical import QT_HEADS, minify_html
+
+FOLDERS = ("Work", "Personal", "Recipes", "Travel", "Projects", "Reading", "Ideas")
+
+# Common words give realistic token frequencies; rare ones make selective queries
+COMMON_WORDS = (
+    "the and for with that this from have will about meeting project notes "
+    "today tomorrow week call email review plan list buy check follow update "
+    "team client budget draft report idea book trip flight hotel dinner lunch "
+    "recipe garden house car doctor appointment school birthday gift shopping "
+    "milk bread eggs coffee tea apple banana tomato onion garlic pasta rice "
+    "monday tuesday wednesday thursday friday weekend morning evening deadline "
+    "finish start discuss send share read write design test deploy release fix"
+).split()
+RARE_WORDS = (
+    "aurora quokka zephyr marzipan obsidian fjord kaleidoscope nebula saffron "
+    "tamarind labyrinth halcyon juniper quasar vellum wisteria xylophone yarrow "
+    "zucchini bergamot cardamom dulcimer ephemeral falafel gossamer hibiscus "
+    "isotope jacaranda kombucha lanolin mandolin nutmeg origami paprika quinoa"
+).split()
+
+BODY_STYLE = (
+    " font-family:'Segoe UI'; font-size:10pt; font-weight:400; font-style:normal;"
+)
+BLOCK_STYLE = (
+    " margin-top:0px; margin-bottom:0px; margin-left:0px; margin-right:0px;"
+    " -qt-block-indent:0; text-indent:0px;"
+)
+HEADING_STYLE = (
+    " margin-top:12px; margin-bottom:6px; margin-left:0px; margin-right:0px;"
+    " -qt-block-indent:0; text-indent:0px;"
+)
+LIST_STYLE = (
+    " margin-top:0px; margin-bottom:0px; margin-left:0px; margin-right:0px;"
+    " -qt-list-indent: 1;"
+)
+
+
+class CorpusGenerator:
+    """Generates note dicts accepted by ``NoteService.create_notes``."""
+
+    RARE_WORD_RATE = 0.02  # Share of body words drawn from RARE_WORDS
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+
+    def notes(
+        self,
+        count: int,
+        folder_ids: Sequence[Any] = (None,)
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield count notes, spread evenly over folder_ids."""
+        rng = random.Random(self.seed)
+        start = datetime(2024, 1, 1)
+        for index in range(count):
+            reminder_at = None
+            if rng.random() < 0.05:
+                reminder_at = start + timedelta(days=rng.randint(0, 730))
+            yield {
+                "title": self.title(rng),
+                "body": self.body(rng),
+                "folder_id": folder_ids[index % len(folder_ids)],
+                "pinned": rng.random() < 0.02,
+                "reminder_at": reminder_at,
+            }
+
+    def title(self, rng: random.Random) -> str:
+        """A short capitalised title."""
+        return " ".join(self._words(rng, rng.randint(1, 5))).capitalize()
+
+    def body(self, rng: random.Random) -> str:
+        """A compact Qt rich text body of a few blocks."""
+        blocks = []
+        for _ in range(rng.randint(1, 8)):
+            kind = rng.random()
+            if kind < 0.15:
+                text = " ".join(self._words(rng, rng.randint(2, 6))).capitalize()
+                blocks.append(
+                    f'<h2 style="{HEADING_STYLE}"><span style=" font-size:14pt;'
+                    f' font-weight:600;">{text}</span></h2>'
+                )
+            elif kind < 0.35:
+                items = "".join(
+                    f'<li class="{rng.choice(("checked", "unchecked"))}"'
+                    f' style="{BLOCK_STYLE}">{self._sentence(rng, 2, 8)}</li>'
+                    for _ in range(rng.randint(2, 6))
+                )
+                blocks.append(f'<ul style="{LIST_STYLE}">{items}</ul>')
+            else:
+                blocks.append(f'<p style="{BLOCK_STYLE}">{self._paragraph(rng)}</p>')
+
+        html = (
+            QT_HEADS[0]
+            + f'<body style="{BODY_STYLE}">\n'
+            + "\n".join(blocks)
+            + "</body></html>"
+        )
+        return minify_html(html)
+
+    def _paragraph(self, rng: random.Random) -> str:
+        """Sentences with the occasional highlighted or bold phrase."""
+        sentences = []
+        for _ in range(rng.randint(1, 6)):
+            sentence = self._sentence(rng, 4, 18)
+            if rng.random() < 0.1:
+                sentence = (
+                    '<span style=" background-color:#fff59d;">' + sentence + "</span>"
+                )
+            elif rng.random() < 0.1:
+                sentence = '<span style=" font-weight:600;">' + sentence + "</span>"
+            sentences.append(sentence)
+        return " ".join(sentences)
+
+    def _sentence(self, rng: random.Random, low: int, high: int) -> str:
+        """A capitalised sentence of low to high words."""
+        return " ".join(self._words(rng, rng.randint(low, high))).capitalize() + "."
+
+    def _words(self, rng: random.Random, count: int) -> List[str]:
+        """Mostly common words, with RARE_WORD_RATE rare ones."""
+        return [
+            rng.choice(RARE_WORDS if rng.random() < self.RARE_WORD_RATE else COMMON_WORDS)
+            for _ in range(count)
+        ]
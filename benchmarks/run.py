@@ -0,0 +1,134 @@
+"""Run the benchmark scenarios and write the results as JSON.
+
+Run from the repository root, for example::
+
+    python -m benchmarks.run --sizes 1000 10000 100000 --output bench.json
+
+Each corpus size gets a fresh database in a temporary directory. A random
+test key is injected into the encryption service, so no keychain (and no
+display) is needed and the user's own notes are never touched. The
+service's key and key store are restored afterwards.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from src.aurora_notes.crypto import encryption
+from src.aurora_notes.crypto.aead import ALGORITHM_NAMES
+from src.aurora_notes.crypto.encryption import encryption_service
+from src.aurora_notes.models.base import dispose_engine, init_db
+from src.aurora_notes.services import search_index
+from src.aurora_notes.services.key_store import DataKeyStore
+from .scenarios import SCENARIOS, Bench
+
+DEFAULT_SIZES = (1000, 10000)
+
+
+@contextmanager
+def bench_encryption() -> Iterator[None]:
+    """Encrypt with a random test key, restoring the key and key store after."""
+    service = encryption_service
+    with service._data_key_lock:
+        saved = (
+            service._key,
+            service._key_store,
+            service._data_keys,
+            service._write_key,
+            service._write_key_uses,
+        )
+    service._key = os.urandom(32)
+    try:
+        yield
+    finally:
+        with service._data_key_lock:
+            (
+                service._key,
+                service._key_store,
+                service._data_keys,
+                service._write_key,
+                service._write_key_uses,
+            ) = saved
+        service.body_cache.clear()
+
+
+def run(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    scenarios: Sequence[str] = tuple(SCENARIOS),
+    repeat: int = 5,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """Run scenarios at each corpus size and return the JSON document.
+
+    bulk_insert always runs first, since it populates the database.
+    """
+    selected = ["bulk_insert"] + [name for name in scenarios if name != "bulk_insert"]
+
+    results: List[Dict[str, Any]] = []
+    with bench_encryption():
+        for size in sizes:
+            with tempfile.TemporaryDirectory(prefix="aurora-bench-") as directory:
+                db_path = os.path.join(directory, "notes.db")
+                encryption_service.attach_key_store(DataKeyStore(init_db(db_path=db_path)))
+                bench = Bench(db_path, size, seed, repeat)
+                try:
+                    for name in selected:
+                        results.extend(SCENARIOS[name](bench))
+                finally:
+                    encryption_service.body_cache.clear()
+                    dispose_engine(db_path)
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "algorithm": ALGORITHM_NAMES[encryption_service.algorithm],
+            "zstd": encryption.zstandard is not None,
+            "numpy": search_index.numpy is not None,
+            "sizes": list(sizes),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Parse arguments, run the benchmarks and write or print the JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+        help="corpus sizes in notes (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS),
+        help="scenarios to run (default: all)"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    document = run(args.sizes, args.scenarios, args.repeat, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        for result in document["results"]:
+            print(
+                f"{result['scenario']:<12} {result['case']:<32} "
+                f"{result['notes']:>9} {result['best'] * 1000:>12.2f} ms"
+            )
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Benchmark scenarios run against a populated note database.
+
+Each scenario takes a ``Bench`` and returns result records: plain dicts
+with the scenario and case names, the corpus size, per-run timings in
+seconds and the best and median of them.
+"""
+
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+from src.aurora_notes.crypto.benchmark import run_benchmarks
+from src.aurora_notes.crypto.encryption import encryption_service
+from src.aurora_notes.services.folder_service import FolderService
+from src.aurora_notes.services.note_service import NoteService
+from .corpus import FOLDERS, CorpusGenerator
+
+# From unselective prefixes to multi-word queries, a rare word and a typo
+SEARCH_QUERIES = (
+    "me",
+    "meet",
+    "meeting",
+    "meeting budget",
+    "meeting budget review",
+    "quokka",
+    "kaleidoscpe",
+)
+TYPED_QUERY = "meeting budget"
+INSERT_BATCH = 5000  # Notes per create_notes call
+
+Result = Dict[str, Any]
+
+
+class Bench:
+    """A note database populated with a synthetic corpus."""
+
+    def __init__(self, db_path: str, size: int, seed: int = 0, repeat: int = 5):
+        self.db_path = db_path
+        self.size = size
+        self.seed = seed
+        self.repeat = repeat
+        self.note_service = NoteService(db_path)
+        self.folder_service = FolderService(db_path)
+
+    def result(
+        self,
+        scenario: str,
+        case: str,
+        runs: List[float],
+        **extra: Any
+    ) -> Result:
+        """Build a result record from per-run timings."""
+        return {
+            "scenario": scenario,
+            "case": case,
+            "notes": self.size,
+            "runs": runs,
+            "best": min(runs),
+            "median": statistics.median(runs),
+            **extra,
+        }
+
+    def time(
+        self,
+        function: Callable[[], Any],
+        setup: Optional[Callable[[], Any]] = None,
+        repeat: Optional[int] = None
+    ) -> List[float]:
+        """Seconds taken by each of repeat calls, running setup untimed first."""
+        runs = []
+        for _ in range(repeat or self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            function()
+            runs.append(time.perf_counter() - start)
+        return runs
+
+    def clear_caches(self):
+        """Drop decrypted bodies and the in-memory search index."""
+        encryption_service.body_cache.clear()
+        self.note_service.search_index.clear()
+
+
+def bulk_insert(bench: Bench) -> List[Result]:
+    """Populate the database; encrypts every body and its plain text."""
+    folder_ids = [bench.folder_service.create_folder(name).id for name in FOLDERS]
+    notes = CorpusGenerator(bench.seed).notes(bench.size, folder_ids)
+
+    elapsed = 0.0
+    while True:
+        batch = [note for _, note in zip(range(INSERT_BATCH), notes)]
+        if not batch:
+            break
+        start = time.perf_counter()
+        bench.note_service.create_notes(batch)
+        elapsed += time.perf_counter() - start
+    return [bench.result(
+        "bulk_insert", "create_notes", [elapsed],
+        notes_per_second=bench.size / max(elapsed, 1e-9)
+    )]
+
+
+def listing(bench: Bench) -> List[Result]:
+    """Note listings with and without decrypting bodies."""
+    service = bench.note_service
+    return [
+        bench.result("listing", "list_note_headers", bench.time(service.list_note_headers)),
+        bench.result(
+            "listing", "first_page",
+            bench.time(lambda: next(service.iter_notes(), None), bench.clear_caches)
+        ),
+        bench.result(
+            "listing", "get_all_notes",
+            bench.time(service.get_all_notes, bench.clear_caches, repeat=1)
+        ),
+    ]
+
+
+def decrypt(bench: Bench) -> List[Result]:
+    """Raw batch decryption of every stored body."""
+    service = bench.note_service
+    blobs = [
+        note.body_enc
+        for page in service._iter_pages(None, service.PAGE_SIZE)
+        for note in page
+    ]
+    runs = bench.time(lambda: encryption_service.decrypt_many(blobs))
+    size = sum(len(blob) for blob in blobs)
+    return [bench.result(
+        "decrypt", "decrypt_many", runs,
+        megabytes_per_second=size / min(runs) / 1e6
+    )]
+
+
+def search(bench: Bench) -> List[Result]:
+    """Index build, snapshot restore, per-query latency and typing."""
+    service = bench.note_service
+    index = service.search_index
+    results = [bench.result(
+        "search", "build_index",
+        bench.time(service.build_search_index, bench.clear_caches, repeat=1)
+    )]
+
+    index.modified = True
+    service.save_search_index()
+    results.append(bench.result(
+        "search", "restore_snapshot",
+        bench.time(service.build_search_index, index.clear, repeat=1)
+    ))
+
+    for query in SEARCH_QUERIES:
+        runs = bench.time(
+            lambda: service.search_notes(query),
+            index._query_cache.clear
+        )
+        results.append(bench.result(
+            "search", query, runs,
+            query_length=len(query),
+            matches=len(service.search_notes(query))
+        ))
+
+    def type_query():
+        for end in range(1, len(TYPED_QUERY) + 1):
+            service.search_notes(TYPED_QUERY[:end])
+
+    results.append(bench.result(
+        "search", "typing", bench.time(type_query, index._query_cache.clear),
+        keystrokes=len(TYPED_QUERY)
+    ))
+    return results
+
+
+def encryption(bench: Bench) -> List[Result]:
+    """AEAD throughput, independent of the corpus."""
+    return [
+        bench.result(
+            "encryption", f"{name} {operation} {size}", [size / (mb_per_s * 1e6)],
+            megabytes_per_second=mb_per_s
+        )
+        for (name, operation, size), mb_per_s in run_benchmarks(rounds=bench.repeat).items()
+    ]
+
+
+# Run in this order; bulk_insert populates the database for the rest
+SCENARIOS: Dict[str, Callable[[Bench], List[Result]]] = {
+    "bulk_insert": bulk_insert,
+    "listing": listing,
+    "decrypt": decrypt,
+    "search": search,
+    "encryption": encryption,
+}
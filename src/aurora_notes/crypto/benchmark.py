@@ -0,0 +1,37 @@
+"""Report AEAD throughput on this machine.
+
+Run with ``python -m aurora_notes.crypto.benchmark``.
+"""
+
+from typing import Dict, Sequence, Tuple
+from .aead import ALGORITHM_NAMES, fastest_algorithm, measure_throughput
+
+SIZES = (1024, 64 * 1024, 1024 * 1024)
+
+
+def run_benchmarks(
+    sizes: Sequence[int] = SIZES,
+    rounds: int = 5
+) -> Dict[Tuple[str, str, int], float]:
+    """Return MB/s keyed by (algorithm name, operation, message size)."""
+    results = {}
+    for algorithm, name in ALGORITHM_NAMES.items():
+        for size in sizes:
+            for operation in ("encrypt", "decrypt"):
+                results[(name, operation, size)] = measure_throughput(
+                    algorithm, size, rounds, decrypt=operation == "decrypt"
+                )
+    return results
+
+
+def main():
+    """Print a throughput table and the algorithm new writes would use."""
+    results = run_benchmarks()
+    print(f"{'algorithm':<20} {'operation':<10} {'size':>10} {'MB/s':>10}")
+    for (name, operation, size), mb_per_s in results.items():
+        print(f"{name:<20} {operation:<10} {size:>10} {mb_per_s:>10.1f}")
+    print(f"Selected for new writes: {ALGORITHM_NAMES[fastest_algorithm()]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Bounded LRU cache of decrypted note bodies."""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+
+class BodyCache:
+    """LRU cache of plaintext bodies keyed by note id and ciphertext version.
+
+    The version is taken from the ciphertext (its header and random nonce),
+    so a rewritten note never matches a stale entry. Entries are evicted
+    least-recently-used first once the byte budget is exceeded. Python
+    strings cannot be overwritten in place, so eviction and clear() drop the
+    cache's only reference and leave reclamation to the allocator.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[bytes, str, int]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size_bytes(self) -> int:
+        """Approximate memory held by cached bodies."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, note_id: Hashable, version: bytes) -> Optional[str]:
+        """Return the cached body, or None if absent or stale."""
+        with self._lock:
+            entry = self._entries.get(note_id)
+            if entry is None:
+                return None
+            if entry[0] != version:
+                self._remove(note_id)
+                return None
+            self._entries.move_to_end(note_id)
+            return entry[1]
+
+    def put(self, note_id: Hashable, version: bytes, body: str):
+        """Cache a body, evicting least recently used entries over budget."""
+        size = sys.getsizeof(body)
+        with self._lock:
+            self._remove(note_id)
+            if size > self.max_bytes:
+                return
+
+            self._entries[note_id] = (version, body, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, note_id: Hashable):
+        """Drop the entry for a note (after update or delete)."""
+        with self._lock:
+            self._remove(note_id)
+
+    def clear(self):
+        """Drop every cached body."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, note_id: Hashable):
+        """Remove an entry; caller holds the lock."""
+        entry = self._entries.pop(note_id, None)
+        if entry is not None:
+            self._size -= entry[2]
@@ -3,21 +3,124 @@
 import os
 import json
 import base64
-from typing import Any, Optional
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.backends import default_backend
+import codecs
+import hashlib
+import hmac
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import (
+    Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
+)
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 import keyring
+from keyring.errors import PasswordDeleteError
+
+from .aead import AEAD_CLASSES, ALG_AES_GCM, Aead, AeadKey, fastest_algorithm
+from .body_cache import BodyCache
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+# Ciphertext layout: FORMAT_VERSION, flags, nonce(12), ciphertext, tag(16).
+# The flags byte holds the AEAD algorithm id (aead.ALG_*) in its high nibble
+# and the codec in its low nibble. The two header bytes are authenticated as
+# associated data. Blobs that do not authenticate with a header are legacy
+# AES-GCM: nonce(12), ciphertext, tag(16).
+FORMAT_VERSION = 1
+# Envelope layout: ENVELOPE_VERSION, flags, data key id (u32 big-endian),
+# nonce(12), ciphertext, tag(16), sealed with a data key instead of the
+# master key. The six header bytes are associated data.
+ENVELOPE_VERSION = 2
+# Chunked layout for large payloads: CHUNKED_VERSION, flags, data key id
+# (u32, 0 for the master key), segment size (u32), salt(16), then segments of
+# ciphertext + tag(16). Every segment holds segment-size bytes of the
+# (compressed) payload except the last. Each blob is sealed with its own
+# subkey, HKDF-SHA256 of the key and the random salt, so segment nonces are
+# just i (u32) + final flag (1 byte) and cannot repeat across blobs however
+# many one key seals. Segments cannot be reordered, dropped or truncated
+# undetected; the 26 header bytes are associated data.
+CHUNKED_VERSION = 4
+CHUNK_HEADER_SIZE = 26
+CHUNK_SALT_SIZE = 16
+CHUNK_KEY_INFO = b"aurora-notes/chunked"
+# Version 3 chunked blobs used the key directly with a random 7-byte nonce
+# prefix in place of the salt (17-byte header); they are still readable.
+LEGACY_CHUNKED_VERSION = 3
+LEGACY_CHUNK_HEADER_SIZE = 17
+CHUNK_HEADER_SIZES = {
+    CHUNKED_VERSION: CHUNK_HEADER_SIZE,
+    LEGACY_CHUNKED_VERSION: LEGACY_CHUNK_HEADER_SIZE,
+}
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODECS = (CODEC_NONE, CODEC_ZLIB, CODEC_ZSTD)
+
+WRAP_AAD = b"aurora-notes/data-key"
+
+
+def split_flags(flags: int) -> Optional[Tuple[int, int]]:
+    """Split a header flags byte into (algorithm, codec), or None if invalid."""
+    algorithm, codec = flags >> 4, flags & 0x0F
+    if algorithm not in AEAD_CLASSES or codec not in CODECS:
+        return None
+    return algorithm, codec
+
+
+def master_key_id(key: bytes) -> str:
+    """Short fingerprint identifying a master key without revealing it."""
+    return hmac.new(key, b"aurora-notes/key-id", hashlib.sha256).hexdigest()[:16]
 
 
 class EncryptionService:
-    """Handles AES-256-GCM encryption with OS keychain integration."""
+    """Handles AES-256-GCM / ChaCha20-Poly1305 encryption with OS keychain integration."""
     
     SERVICE_NAME = "AuroraNotes"
     KEY_NAME = "master_key"
+    NEXT_KEY_NAME = "master_key_next"  # Present while a rotation is unfinished
+    DATA_KEY_MAX_USES = 2 ** 24  # Encryptions per data key before rolling over
+    COMPRESS_MIN_SIZE = 512  # Bytes; smaller payloads are stored uncompressed
+    SEGMENT_SIZE = 64 * 1024  # Bytes per segment; larger payloads are chunked
+    KEYCHAIN_TIMEOUT = 30.0  # Seconds to wait for a background key fetch
+    BENCHMARK_ON_STARTUP = True  # Pick the fastest AEAD after the key loads
     
     def __init__(self):
         self._key: Optional[bytes] = None
-        self._backend = default_backend()
+        self._ready: Optional[Future] = None
+        self.key_fetch_ms: Optional[float] = None  # Duration of last background fetch
+        self._aead: Optional[AeadKey] = None
+        self._aead_key: Optional[bytes] = None
+        # Algorithm for new ciphertexts; every supported one still decrypts
+        self.algorithm = ALG_AES_GCM
+        
+        # Envelope encryption; without a key store the master key is used
+        self._next_key: Optional[bytes] = None
+        self._key_store = None
+        self._data_keys: Dict[int, AeadKey] = {}
+        self._write_key: Optional[Tuple[int, AeadKey]] = None
+        self._write_key_uses = 0
+        self._data_key_lock = threading.RLock()
+        
+        # Batch parallelism; AES-GCM and zlib release the GIL
+        self.workers = os.cpu_count() or 1
+        self.chunk_size = 64  # Items per worker task
+        self.parallel_min_items = 256  # Smaller batches run serially
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_workers = 0
+        
+        # Decrypted note bodies, cleared with the key
+        self.body_cache = BodyCache()
     
     def initialize(self) -> bool:
         """Initialize encryption key from OS keychain or create new."""
@@ -25,6 +128,11 @@ class EncryptionService:
             # Try to get existing key from OS keychain
             stored_key = keyring.get_password(self.SERVICE_NAME, self.KEY_NAME)
             
+            # Key left behind by an interrupted rotation
+            next_key = keyring.get_password(self.SERVICE_NAME, self.NEXT_KEY_NAME)
+            if next_key:
+                self._next_key = base64.b64decode(next_key)
+            
             if stored_key:
                 self._key = base64.b64decode(stored_key)
             else:
@@ -42,49 +150,581 @@ class EncryptionService:
             print(f"Failed to initialize encryption: {e}")
             return False
     
-    def encrypt(self, plaintext: str) -> bytes:
-        """Encrypt string to bytes using AES-256-GCM."""
+    def initialize_async(self) -> Future:
+        """Start initialize() on a background thread.
+        
+        Returns a future resolving to initialize()'s result. The first
+        encrypt/decrypt waits on it, so callers only need to start it early.
+        """
+        future: Future = Future()
+        
+        def run():
+            start = time.perf_counter()
+            try:
+                result = self.initialize()
+            except BaseException as e:
+                self.key_fetch_ms = (time.perf_counter() - start) * 1000
+                future.set_exception(e)
+            else:
+                self.key_fetch_ms = (time.perf_counter() - start) * 1000
+                future.set_result(result)
+                if result and self.BENCHMARK_ON_STARTUP:
+                    self.select_fastest_algorithm()
+        
+        self._ready = future
+        threading.Thread(target=run, name="aurora-keychain", daemon=True).start()
+        return future
+    
+    def select_fastest_algorithm(self) -> int:
+        """Benchmark the supported AEADs and use the fastest for new writes.
+        
+        ChaCha20-Poly1305 wins on CPUs without AES instructions; existing
+        notes keep decrypting with whichever algorithm sealed them.
+        """
+        self.algorithm = fastest_algorithm()
+        return self.algorithm
+    
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a pending background key fetch; True if a key is loaded."""
+        if self._ready is not None and not self._key:
+            self._ready.result(timeout)
+        return self._key is not None
+    
+    @property
+    def key_pending(self) -> bool:
+        """Whether a background key fetch is still running."""
+        return self._ready is not None and not self._ready.done()
+    
+    def when_ready(self, callback: Callable[[bool], Any]):
+        """Call callback(key loaded) once a pending background fetch ends.
+        
+        Runs it at once if no fetch is pending, otherwise on the fetching
+        thread; Qt callers should pass a signal's emit.
+        """
+        future = self._ready
+        if future is None or self._key:
+            callback(self._key is not None)
+        else:
+            future.add_done_callback(lambda _: callback(self._key is not None))
+    
+    def _require_key(self) -> bytes:
+        """Return the key, waiting for a background fetch if one is pending."""
+        if not self._key and self._ready is not None:
+            try:
+                self.wait_ready(self.KEYCHAIN_TIMEOUT)
+            except FutureTimeoutError:
+                raise RuntimeError("Timed out waiting for the encryption key") from None
         if not self._key:
             raise RuntimeError("Encryption not initialized")
+        return self._key
+    
+    def attach_key_store(self, key_store):
+        """Switch to envelope encryption with data keys persisted in key_store.
         
-        # Generate random 96-bit nonce
-        nonce = os.urandom(12)
+        key_store provides ``add(wrapped_key, master_key_id) -> int`` and
+        ``get(key_id) -> Optional[tuple[bytes, str]]``.
+        """
+        with self._data_key_lock:
+            self._key_store = key_store
+            self._data_keys = {}
+            self._write_key = None
+            self._write_key_uses = 0
+    
+    def encrypt(self, plaintext: str) -> bytes:
+        """Encrypt string to bytes using AES-256-GCM.
         
-        # Create cipher
-        cipher = Cipher(
-            algorithms.AES(self._key),
-            modes.GCM(nonce),
-            backend=self._backend
+        Payloads of at least COMPRESS_MIN_SIZE bytes are compressed first
+        (zstd when available, otherwise zlib) if that makes them smaller.
+        With a key store attached the current data key is used.
+        """
+        return self._encrypt_one(self._get_write_key(1), plaintext)
+    
+    def decrypt(self, encrypted: Union[bytes, memoryview]) -> str:
+        """Decrypt bytes to string using AES-256-GCM."""
+        return self._decrypt_one(self._get_aead(), encrypted)
+    
+    def encrypt_many(self, plaintexts: Iterable[str]) -> List[bytes]:
+        """Encrypt many strings, returning ciphertexts in input order."""
+        plaintexts = list(plaintexts)
+        write_key = self._get_write_key(len(plaintexts))
+        return self._map_parallel(
+            lambda plaintext: self._encrypt_one(write_key, plaintext),
+            plaintexts
         )
-        encryptor = cipher.encryptor()
+    
+    def decrypt_many(self, blobs: Iterable[Union[bytes, memoryview]]) -> List[str]:
+        """Decrypt many ciphertexts, returning strings in input order.
+        
+        Accepts any bytes-like objects; memoryviews are sliced without copying.
+        Large batches are split into chunks across a thread pool.
+        """
+        aead = self._get_aead()
+        blobs = list(blobs)
         
-        # Encrypt
-        ciphertext = encryptor.update(plaintext.encode()) + encryptor.finalize()
+        # Unwrap data keys up front rather than from worker threads
+        for blob in blobs:
+            key_id = self.data_key_id(blob)
+            if key_id is not None:
+                self._get_data_key(key_id)
         
-        # Return nonce + ciphertext + tag
-        return nonce + ciphertext + encryptor.tag
+        return self._map_parallel(
+            lambda blob: self._decrypt_one(aead, blob),
+            blobs
+        )
     
-    def decrypt(self, encrypted: bytes) -> str:
-        """Decrypt bytes to string using AES-256-GCM."""
-        if not self._key:
-            raise RuntimeError("Encryption not initialized")
+    def decrypt_cached(self, note_id: Hashable, encrypted: Union[bytes, memoryview]) -> str:
+        """Decrypt a note body, reusing the cached plaintext for this ciphertext."""
+        version = self._version(encrypted)
+        body = self.body_cache.get(note_id, version)
+        if body is None:
+            body = self.decrypt(encrypted)
+            self.body_cache.put(note_id, version, body)
+        return body
+    
+    def decrypt_many_cached(
+        self,
+        note_ids: Iterable[Hashable],
+        blobs: Iterable[Union[bytes, memoryview]]
+    ) -> List[str]:
+        """Batch variant of decrypt_cached; only cache misses are decrypted."""
+        note_ids = list(note_ids)
+        blobs = list(blobs)
+        versions = [self._version(blob) for blob in blobs]
+        bodies = [
+            self.body_cache.get(note_id, version)
+            for note_id, version in zip(note_ids, versions)
+        ]
+        
+        misses = [i for i, body in enumerate(bodies) if body is None]
+        if misses:
+            decrypted = self.decrypt_many(blobs[i] for i in misses)
+            for i, body in zip(misses, decrypted):
+                bodies[i] = body
+                self.body_cache.put(note_ids[i], versions[i], body)
+        return bodies
+    
+    def data_key_id(self, encrypted: Union[bytes, memoryview]) -> Optional[int]:
+        """Data key id from an envelope ciphertext header, else None."""
+        view = memoryview(encrypted)
+        if len(view) >= 34 and view[0] == ENVELOPE_VERSION:
+            return int.from_bytes(view[2:6], "big")
+        header_size = CHUNK_HEADER_SIZES.get(view[0]) if len(view) else None
+        if header_size is not None and len(view) >= header_size + 16:
+            return int.from_bytes(view[2:6], "big") or None
+        return None
+    
+    def iter_decrypt(self, encrypted: Union[bytes, memoryview]) -> Iterator[str]:
+        """Decrypt incrementally, yielding text one segment at a time.
         
-        # Extract components
-        nonce = encrypted[:12]
-        tag = encrypted[-16:]
-        ciphertext = encrypted[12:-16]
+        Chunked ciphertexts are authenticated and decompressed segment by
+        segment, so a caller that stops early never touches the rest of the
+        blob. Other formats are decrypted in one piece.
+        """
+        view = memoryview(encrypted)
+        segments = self._open_chunked(self._get_aead(), view)
+        if segments is None:
+            yield self.decrypt(view)
+            return
         
-        # Create cipher
-        cipher = Cipher(
-            algorithms.AES(self._key),
-            modes.GCM(nonce, tag),
-            backend=self._backend
+        decompress = self._stream_decompressor(view[1] & 0x0F)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for segment in segments:
+            text = decoder.decode(decompress(segment))
+            if text:
+                yield text
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
+    
+    def decrypt_prefix(self, encrypted: Union[bytes, memoryview], max_chars: int) -> str:
+        """Decrypt only as much as needed for the first max_chars characters."""
+        parts: List[str] = []
+        count = 0
+        for text in self.iter_decrypt(encrypted):
+            parts.append(text)
+            count += len(text)
+            if count >= max_chars:
+                break
+        return "".join(parts)[:max_chars]
+    
+    @property
+    def rotation_pending(self) -> bool:
+        """Whether a master key rotation has started but not finished."""
+        return self._next_key is not None
+    
+    def begin_rotation(self) -> str:
+        """Create (or resume) the next master key and return its id.
+        
+        The key is saved to the keychain before anything is re-wrapped, so
+        an interrupted rotation can resume. New data keys are wrapped with it
+        from now on.
+        """
+        self._require_key()
+        if self._next_key is None:
+            next_key = os.urandom(32)
+            keyring.set_password(
+                self.SERVICE_NAME,
+                self.NEXT_KEY_NAME,
+                base64.b64encode(next_key).decode()
+            )
+            self._next_key = next_key
+        
+        with self._data_key_lock:
+            self._write_key = None
+        return master_key_id(self._next_key)
+    
+    def rewrap_data_key(self, wrapped_key: bytes, wrapping_key_id: str) -> bytes:
+        """Re-wrap a data key from its current master key to the next one."""
+        if self._next_key is None:
+            raise RuntimeError("No key rotation in progress")
+        data_key = self._unwrap(wrapped_key, wrapping_key_id)
+        return self._wrap(data_key, self._next_key)
+    
+    def finish_rotation(self):
+        """Make the next key the master key once every data key is re-wrapped."""
+        if self._next_key is None:
+            raise RuntimeError("No key rotation in progress")
+        
+        keyring.set_password(
+            self.SERVICE_NAME,
+            self.KEY_NAME,
+            base64.b64encode(self._next_key).decode()
         )
-        decryptor = cipher.decryptor()
+        try:
+            keyring.delete_password(self.SERVICE_NAME, self.NEXT_KEY_NAME)
+        except PasswordDeleteError:
+            pass
+        
+        self._key = self._next_key
+        self._next_key = None
+        self._aead = None
+        self._aead_key = None
+    
+    def _master_keys(self) -> Dict[str, bytes]:
+        """Current and in-rotation master keys by fingerprint."""
+        keys = {master_key_id(self._require_key()): self._key}
+        if self._next_key is not None:
+            keys[master_key_id(self._next_key)] = self._next_key
+        return keys
+    
+    def _wrap(self, data_key: bytes, master_key: bytes) -> bytes:
+        """Encrypt a data key under a master key."""
+        nonce = os.urandom(12)
+        return nonce + AESGCM(master_key).encrypt(nonce, data_key, WRAP_AAD)
+    
+    def _unwrap(self, wrapped_key: bytes, wrapping_key_id: str) -> bytes:
+        """Decrypt a data key with the master key that wrapped it."""
+        master_key = self._master_keys().get(wrapping_key_id)
+        if master_key is None:
+            raise RuntimeError(f"Master key {wrapping_key_id} is not available")
+        return AESGCM(master_key).decrypt(wrapped_key[:12], wrapped_key[12:], WRAP_AAD)
+    
+    def _get_write_key(self, uses: int) -> Tuple[Optional[int], AeadKey]:
+        """Return (data key id, key) for new ciphertexts.
+        
+        Without a key store this is (None, master key). Otherwise a data
+        key is created on first use and replaced after DATA_KEY_MAX_USES
+        encryptions.
+        """
+        if self._key_store is None:
+            return None, self._get_aead()
+        
+        self._require_key()
+        with self._data_key_lock:
+            if (
+                self._write_key is None
+                or self._write_key_uses + uses > self.DATA_KEY_MAX_USES
+            ):
+                data_key = os.urandom(32)
+                wrapping_key = self._next_key or self._key
+                key_id = self._key_store.add(
+                    self._wrap(data_key, wrapping_key),
+                    master_key_id(wrapping_key)
+                )
+                key = AeadKey(data_key)
+                self._data_keys[key_id] = key
+                self._write_key = (key_id, key)
+                self._write_key_uses = 0
+            
+            self._write_key_uses += uses
+            return self._write_key
+    
+    def _get_data_key(self, key_id: int) -> Optional[AeadKey]:
+        """Return the unwrapped data key, or None if unknown."""
+        with self._data_key_lock:
+            key = self._data_keys.get(key_id)
+            if key is not None or self._key_store is None:
+                return key
+            
+            stored = self._key_store.get(key_id)
+            if stored is None:
+                return None
+            wrapped_key, wrapping_key_id = stored
+            try:
+                key = AeadKey(self._unwrap(wrapped_key, wrapping_key_id))
+            except InvalidTag:
+                return None
+            self._data_keys[key_id] = key
+            return key
+    
+    def _version(self, encrypted: Union[bytes, memoryview]) -> bytes:
+        """Identify a ciphertext by its header and random nonce."""
+        return bytes(memoryview(encrypted)[:CHUNK_HEADER_SIZE])
+    
+    def _map_parallel(self, func: Callable[[T], R], items: List[T]) -> List[R]:
+        """Apply func to items in order, in parallel chunks for large batches."""
+        if self.workers <= 1 or len(items) < self.parallel_min_items:
+            return [func(item) for item in items]
+        
+        chunk_size = max(1, self.chunk_size)
+        chunks = [
+            items[start:start + chunk_size]
+            for start in range(0, len(items), chunk_size)
+        ]
+        results: List[R] = []
+        for chunk_result in self._get_executor().map(
+            lambda chunk: [func(item) for item in chunk], chunks
+        ):
+            results.extend(chunk_result)
+        return results
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the worker pool, recreating it if the worker count changed."""
+        if self._executor is None or self._executor_workers != self.workers:
+            self._shutdown_executor()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="aurora-crypto"
+            )
+            self._executor_workers = self.workers
+        return self._executor
+    
+    def _shutdown_executor(self):
+        """Stop the worker pool if running."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def _get_aead(self) -> AeadKey:
+        """Return the AEAD objects for the current key, reusing them across calls."""
+        key = self._require_key()
+        if self._aead is None or self._aead_key is not key:
+            self._aead = AeadKey(key)
+            self._aead_key = key
+        return self._aead
+    
+    def _encrypt_one(self, write_key: Tuple[Optional[int], AeadKey], plaintext: str) -> bytes:
+        """Encrypt one string to header + nonce + ciphertext + tag."""
+        key_id, key = write_key
+        algorithm = self.algorithm
+        aead = key.aead(algorithm)
+        codec, payload = self._compress(plaintext.encode())
+        flags = algorithm << 4 | codec
+        if len(payload) > self.SEGMENT_SIZE:
+            return self._encrypt_chunked(key_id, key, flags, payload)
+        
+        if key_id is None:
+            header = bytes((FORMAT_VERSION, flags))
+        else:
+            header = bytes((ENVELOPE_VERSION, flags)) + key_id.to_bytes(4, "big")
+        
+        # Generate random 96-bit nonce
+        nonce = os.urandom(12)
+        return header + nonce + aead.encrypt(nonce, payload, header)
+    
+    def _encrypt_chunked(
+        self,
+        key_id: Optional[int],
+        key: AeadKey,
+        flags: int,
+        payload: bytes
+    ) -> bytes:
+        """Encrypt a large payload as independently authenticated segments."""
+        segment_size = self.SEGMENT_SIZE
+        header = (
+            bytes((CHUNKED_VERSION, flags))
+            + (key_id or 0).to_bytes(4, "big")
+            + segment_size.to_bytes(4, "big")
+            + os.urandom(CHUNK_SALT_SIZE)
+        )
+        aead = self._chunk_aead(key, flags >> 4, header)
+        view = memoryview(payload)
+        
+        parts = [header]
+        starts = range(0, max(len(view), 1), segment_size)
+        for index, start in enumerate(starts):
+            final = start + segment_size >= len(view)
+            nonce = bytes(7) + index.to_bytes(4, "big") + bytes((final,))
+            parts.append(aead.encrypt(nonce, view[start:start + segment_size], header))
+        return b"".join(parts)
+    
+    def _chunk_aead(self, key: AeadKey, algorithm: int, header: Union[bytes, memoryview]) -> Aead:
+        """AEAD for one chunked blob, keyed by a subkey derived from its salt."""
+        subkey = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=bytes(header[10:CHUNK_HEADER_SIZE]),
+            info=CHUNK_KEY_INFO + bytes(header[:10]),
+        ).derive(key.key)
+        return AEAD_CLASSES[algorithm](subkey)
+    
+    def _open_chunked(
+        self,
+        key: AeadKey,
+        view: memoryview
+    ) -> Optional[Iterator[bytes]]:
+        """Return an iterator of decrypted segments, or None if not chunked.
+        
+        The first segment is authenticated eagerly so a legacy blob that
+        merely looks like a chunked header is rejected here; later segments
+        are decrypted lazily and raise InvalidTag if tampered with.
+        """
+        header_size = CHUNK_HEADER_SIZES.get(view[0]) if len(view) else None
+        if header_size is None or len(view) < header_size + 16:
+            return None
+        flags = split_flags(view[1])
+        if flags is None:
+            return None
+        
+        key_id = int.from_bytes(view[2:6], "big")
+        if key_id:
+            key = self._get_data_key(key_id)
+            if key is None:
+                return None
+        segment_size = int.from_bytes(view[6:10], "big")
+        if segment_size == 0:
+            return None
+        
+        header = view[:header_size]
+        body = view[header_size:]
+        if view[0] == CHUNKED_VERSION:
+            aead = self._chunk_aead(key, flags[0], header)
+            nonce_prefix = bytes(7)
+        else:
+            aead = key.aead(flags[0])
+            nonce_prefix = bytes(view[10:header_size])
+        sealed_size = segment_size + 16
+        count = max(1, -(-len(body) // sealed_size))
+        if len(body) - (count - 1) * sealed_size < 16:
+            return None
+        
+        def open_segment(index: int) -> bytes:
+            final = index == count - 1
+            nonce = nonce_prefix + index.to_bytes(4, "big") + bytes((final,))
+            start = index * sealed_size
+            return aead.decrypt(nonce, body[start:start + sealed_size], header)
+        
+        try:
+            first = open_segment(0)
+        except InvalidTag:
+            return None
+        
+        def segments() -> Iterator[bytes]:
+            yield first
+            for index in range(1, count):
+                yield open_segment(index)
+        
+        return segments()
+    
+    def _decrypt_one(self, key: AeadKey, encrypted: Union[bytes, memoryview]) -> str:
+        """Decrypt one chunked, envelope, versioned or legacy ciphertext.
+        
+        key is the master key used for non-envelope formats.
+        """
+        view = memoryview(encrypted)
+        flags = split_flags(view[1]) if len(view) > 1 else None
+        
+        segments = self._open_chunked(key, view)
+        if segments is not None:
+            return self._decompress(flags[1], b"".join(segments)).decode()
+        
+        key_id = self.data_key_id(view)
+        if key_id is not None and flags is not None:
+            data_key = self._get_data_key(key_id)
+            if data_key is not None:
+                try:
+                    payload = data_key.aead(flags[0]).decrypt(view[6:18], view[18:], view[:6])
+                except InvalidTag:
+                    # Legacy blob whose nonce happens to look like a header
+                    pass
+                else:
+                    return self._decompress(flags[1], payload).decode()
+        
+        if len(view) >= 30 and view[0] == FORMAT_VERSION and flags is not None:
+            try:
+                payload = key.aead(flags[0]).decrypt(view[2:14], view[14:], view[:2])
+            except InvalidTag:
+                # Legacy blob whose nonce happens to look like a header
+                pass
+            else:
+                return self._decompress(flags[1], payload).decode()
+        
+        return key.aead(ALG_AES_GCM).decrypt(view[:12], view[12:], None).decode()
+    
+    def _compress(self, data: bytes) -> tuple[int, bytes]:
+        """Compress data when large enough to benefit, returning (codec, payload)."""
+        if len(data) < self.COMPRESS_MIN_SIZE:
+            return CODEC_NONE, data
+        
+        if zstandard is not None:
+            codec = CODEC_ZSTD
+            compressed = self._zstd_compress(data)
+        else:
+            codec = CODEC_ZLIB
+            compressed = zlib.compress(data, 6)
+        
+        if len(compressed) >= len(data):
+            return CODEC_NONE, data
+        return codec, compressed
+    
+    def _zstd_compress(self, data: bytes) -> bytes:
+        """Compress with zstd, ending a block every SEGMENT_SIZE input bytes.
+        
+        A zstd decoder only emits output once a whole block has arrived, so
+        payloads large enough to be chunked are flushed per segment to keep
+        iter_decrypt() incremental.
+        """
+        if len(data) <= self.SEGMENT_SIZE:
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        
+        compressor = zstandard.ZstdCompressor(level=3).compressobj(size=len(data))
+        view = memoryview(data)
+        parts = []
+        for start in range(0, len(view), self.SEGMENT_SIZE):
+            parts.append(compressor.compress(view[start:start + self.SEGMENT_SIZE]))
+            parts.append(compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK))
+        parts.append(compressor.flush())
+        return b"".join(parts)
+    
+    def _decompress(self, codec: int, payload: bytes) -> bytes:
+        """Reverse _compress for the given codec."""
+        if codec == CODEC_ZLIB:
+            return zlib.decompress(payload)
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to decrypt this note")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        return payload
+    
+    def _stream_decompressor(self, codec: int) -> Callable[[bytes], bytes]:
+        """Return an incremental decompress function for the given codec."""
+        if codec == CODEC_ZLIB:
+            return zlib.decompressobj().decompress
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to decrypt this note")
+            return zstandard.ZstdDecompressor().decompressobj().decompress
+        return bytes
+    
+    def digest(self, plaintext: str) -> bytes:
+        """Keyed HMAC-SHA256 of plaintext for change detection.
         
-        # Decrypt
-        plaintext = decryptor.update(ciphertext) + decryptor.finalize()
-        return plaintext.decode()
+        Uses a subkey derived from the master key, so digests reveal nothing
+        about content without it.
+        """
+        key = self._require_key()
+        digest_key = hmac.new(key, b"aurora-notes/body-digest", hashlib.sha256).digest()
+        return hmac.new(digest_key, plaintext.encode(), hashlib.sha256).digest()
     
     def encrypt_json(self, data: Any) -> bytes:
         """Encrypt JSON-serializable data."""
@@ -98,6 +738,15 @@ class EncryptionService:
     
     def clear_key(self):
         """Clear key from memory (called on app exit)."""
+        self._shutdown_executor()
+        self.body_cache.clear()
+        self._ready = None
+        self._aead = None
+        self._aead_key = None
+        with self._data_key_lock:
+            self._data_keys = {}
+            self._write_key = None
+        self._next_key = None
         if self._key:
             # Overwrite key bytes
             self._key = b'\x00' * len(self._key)
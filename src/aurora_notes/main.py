@@ -1,6 +1,7 @@
 """Application entry point."""
 
 import sys
+import threading
 import time
 from PySide6.QtWidgets import QApplication, QSplashScreen
 from PySide6.QtCore import Qt, QTimer
@@ -8,6 +9,8 @@ from PySide6.QtGui import QPixmap, QPalette, QColor
 
 from .models.base import init_db
 from .crypto.encryption import encryption_service
+from .services.key_rotation import KeyRotationJob
+from .services.key_store import DataKeyStore
 from .ui.main_window import MainWindow
 
 
@@ -33,7 +36,19 @@ def show_splash():
 def main():
     """Main application entry point."""
     # Record start time for performance tracking
-    start_time = time.time()
+    start_time = time.perf_counter()
+    phase_start = start_time
+    phases = []  # (phase name, milliseconds)
+    
+    def mark(phase: str):
+        nonlocal phase_start
+        now = time.perf_counter()
+        phases.append((phase, (now - phase_start) * 1000))
+        phase_start = now
+    
+    # Fetch the key from the OS keychain in the background; the first
+    # decrypt waits for it, everything before that runs in parallel
+    encryption_service.initialize_async()
     
     # Create application
     app = QApplication(sys.argv)
@@ -44,27 +59,74 @@ def main():
     splash = show_splash()
     splash.show()
     app.processEvents()
+    mark("qt")
     
     try:
-        # Initialize database
-        init_db()
-        
-        # Initialize encryption
-        if not encryption_service.initialize():
-            print("Failed to initialize encryption")
-            return 1
+        # Initialize database; encrypt with data keys kept next to the notes
+        engine = init_db()
+        encryption_service.attach_key_store(DataKeyStore(engine))
+        mark("database")
         
         # Create main window
         window = MainWindow()
+        mark("window")
+        
+        # Jobs that decrypt notes start once the key is in; the window does
+        # not wait for the keychain and reports a failure itself
+        note_service = window.note_service
+        
+        def start_background_jobs(loaded: bool):
+            if not loaded:
+                return
+            
+            # Finish a master key rotation that was interrupted last session,
+            # off the GUI thread; if the app exits first it resumes next launch
+            if encryption_service.rotation_pending:
+                def resume_rotation():
+                    try:
+                        counts = KeyRotationJob(note_service).run()
+                        print(f"Resumed key rotation: {counts}")
+                    except Exception as e:
+                        print(f"Key rotation failed: {e}")
+                
+                threading.Thread(
+                    target=resume_rotation,
+                    name="aurora-key-rotation",
+                    daemon=True
+                ).start()
+            
+            # Build the search index off the GUI thread; an early search waits for it.
+            # With the blind index, searches decrypt only its candidates instead,
+            # so just digest notes saved before it was enabled.
+            if note_service.blind_index:
+                threading.Thread(
+                    target=note_service.backfill_blind_index,
+                    name="aurora-blind-index",
+                    daemon=True
+                ).start()
+            else:
+                threading.Thread(
+                    target=note_service.build_search_index,
+                    name="aurora-search-index",
+                    daemon=True
+                ).start()
+        
+        encryption_service.when_ready(start_background_jobs)
         
         # Hide splash and show main window after 100ms
         def show_main():
             window.show()
             splash.finish(window)
+            mark("show")
             
             # Log startup time
-            elapsed = (time.time() - start_time) * 1000
+            elapsed = (time.perf_counter() - start_time) * 1000
             print(f"Cold start time: {elapsed:.0f}ms")
+            fetch_ms = encryption_service.key_fetch_ms
+            keychain = "still running" if fetch_ms is None else f"{fetch_ms:.0f}ms"
+            print("Startup phases: " + ", ".join(
+                f"{phase} {ms:.0f}ms" for phase, ms in phases
+            ) + f" (keychain fetch {keychain} in background)")
         
         QTimer.singleShot(100, show_main)
         
@@ -1,24 +1,55 @@
 """SQLModel base configuration and models."""
 
 from datetime import datetime
-from typing import Optional
+from typing import Dict, NamedTuple, Optional
 from uuid import UUID, uuid4
 from sqlmodel import Field, SQLModel, Session, create_engine
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import Index, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
 import os
+import threading
+
+from .migrations import drop_schema, migrate
 
 
 class Note(SQLModel, table=True):
     """Encrypted note model."""
     
+    # Created by migration 2; keep names in sync with models/migrations.py
+    __table_args__ = (
+        Index("ix_note_folder_pinned_updated", "folder_id", "pinned", "updated_at"),
+        Index("ix_note_pinned_updated", "pinned", "updated_at"),
+        Index("ix_note_updated_id", "updated_at", "id"),
+        Index("ix_note_reminder_at", "reminder_at"),
+        Index("ix_note_data_key_id", "data_key_id"),
+        Index("ix_note_change_seq", "change_seq"),
+    )
+    
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     title: str = Field(max_length=255)
     body_enc: bytes  # AES-256-GCM encrypted HTML
+    body_digest: Optional[bytes] = Field(default=None)  # Keyed HMAC of plaintext body
+    text_enc: Optional[bytes] = Field(default=None)  # Encrypted plain text of body for search
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     pinned: bool = Field(default=False)
     reminder_at: Optional[datetime] = Field(default=None)
     folder_id: Optional[UUID] = Field(default=None, foreign_key="folder.id")
+    # None: legacy blob sealed directly with the master key
+    data_key_id: Optional[int] = Field(default=None, foreign_key="data_key.id")
+    change_seq: int = Field(default=0)  # Set by triggers to the note change counter
+
+
+class NoteHeader(NamedTuple):
+    """Lightweight note metadata for listings (no body)."""
+    
+    id: UUID
+    title: str
+    pinned: bool
+    folder_id: Optional[UUID]
+    updated_at: datetime
+    reminder_at: Optional[datetime]
 
 
 class Folder(SQLModel, table=True):
@@ -28,6 +59,26 @@ class Folder(SQLModel, table=True):
     name: str = Field(max_length=100, unique=True)
 
 
+class DataKey(SQLModel, table=True):
+    """Per-batch data encryption key, wrapped by the master key."""
+    
+    __tablename__ = "data_key"
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    wrapped_key: bytes  # nonce + AES-256-GCM(master key, data key)
+    master_key_id: str = Field(max_length=32, index=True)  # Fingerprint of wrapping key
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class NoteToken(SQLModel, table=True):
+    """Keyed digest of a trigram occurring in a note (blind index entry)."""
+    
+    __tablename__ = "note_token"
+    
+    token: bytes = Field(primary_key=True)  # Truncated HMAC of the trigram
+    note_id: UUID = Field(primary_key=True, foreign_key="note.id", index=True)
+
+
 class Settings(SQLModel, table=True):
     """Encrypted application settings."""
     
@@ -47,34 +98,107 @@ def get_db_path() -> str:
     return os.path.join(app_dir, 'notes.db')
 
 
-def create_db_engine():
-    """Create SQLAlchemy engine with optimizations."""
-    db_path = get_db_path()
+# PRAGMA profile applied once to every new SQLite connection
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", 30000),
+    ("cache_size", 10000),
+    ("mmap_size", 268435456),  # 256 MiB
+    ("temp_store", "MEMORY"),
+)
+
+# Shared engines keyed by absolute database path
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    """Apply the PRAGMA profile to a freshly opened connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(
+    db_path: Optional[str] = None,
+    poolclass=QueuePool,
+    **pool_kwargs
+) -> Engine:
+    """Create a new SQLAlchemy engine with optimizations.
+
+    The default QueuePool checks a connection out for each session, so the
+    GUI, autosave, search and rotation threads never share one; connections
+    may be reused across threads, hence ``check_same_thread=False``.
+    Services should use ``get_engine()`` instead, which shares one engine
+    per database file.
+    """
+    if db_path is None:
+        db_path = get_db_path()
     engine = create_engine(
         f"sqlite:///{db_path}",
         connect_args={
             "check_same_thread": False,
             "timeout": 30.0,
         },
-        poolclass=StaticPool,
+        poolclass=poolclass,
+        **pool_kwargs
     )
-    
-    # Apply performance pragmas
-    with engine.connect() as conn:
-        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
-        conn.exec_driver_sql("PRAGMA synchronous=NORMAL")
-        conn.exec_driver_sql("PRAGMA cache_size=10000")
-        conn.exec_driver_sql("PRAGMA temp_store=MEMORY")
-    
+    event.listen(engine, "connect", _apply_pragmas)
     return engine
 
 
-def init_db():
-    """Initialize database tables.
+def get_engine(
+    db_path: Optional[str] = None,
+    poolclass=QueuePool,
+    **pool_kwargs
+) -> Engine:
+    """Get the shared engine for a database, creating it on first use.
 
-    Existing tables are dropped first so tests run against a clean database.
+    Pool settings only apply when the engine is first created; later calls
+    for the same path return the existing engine unchanged.
     """
-    engine = create_db_engine()
-    SQLModel.metadata.drop_all(engine)
-    SQLModel.metadata.create_all(engine)
-    return engine
\ No newline at end of file
+    if db_path is None:
+        db_path = get_db_path()
+    key = os.path.abspath(db_path)
+
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = create_db_engine(key, poolclass=poolclass, **pool_kwargs)
+            _engines[key] = engine
+        return engine
+
+
+def dispose_engine(db_path: Optional[str] = None):
+    """Dispose the shared engine for one database, if it was created."""
+    if db_path is None:
+        db_path = get_db_path()
+    with _engines_lock:
+        engine = _engines.pop(os.path.abspath(db_path), None)
+    if engine is not None:
+        engine.dispose()
+
+
+def dispose_engines():
+    """Dispose all shared engines and close their connections."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+def init_db(reset: bool = False, db_path: Optional[str] = None):
+    """Initialize database tables by applying pending migrations.
+
+    Pass ``reset=True`` to drop every table first and start from a clean
+    database (used by tests).
+    """
+    engine = get_engine(db_path)
+    if reset:
+        drop_schema(engine)
+    migrate(engine)
+    return engine
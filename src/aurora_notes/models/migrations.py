@@ -0,0 +1,258 @@
+"""Versioned schema migrations."""
+
+from typing import Callable, List, Tuple
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+
+def _create_base_tables(conn: Connection):
+    """Create the original folder, settings and note tables."""
+    conn.exec_driver_sql(
+        """
+        CREATE TABLE IF NOT EXISTS folder (
+            id CHAR(32) NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            PRIMARY KEY (id),
+            UNIQUE (name)
+        )
+        """
+    )
+    conn.exec_driver_sql(
+        """
+        CREATE TABLE IF NOT EXISTS settings (
+            "key" VARCHAR(100) NOT NULL,
+            value_enc BLOB NOT NULL,
+            PRIMARY KEY ("key")
+        )
+        """
+    )
+    conn.exec_driver_sql(
+        """
+        CREATE TABLE IF NOT EXISTS note (
+            id CHAR(32) NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            body_enc BLOB NOT NULL,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL,
+            pinned BOOLEAN NOT NULL,
+            reminder_at DATETIME,
+            folder_id CHAR(32),
+            PRIMARY KEY (id),
+            FOREIGN KEY(folder_id) REFERENCES folder (id)
+        )
+        """
+    )
+
+
+def _add_note_indexes(conn: Connection):
+    """Index note listing, ordering and reminder lookups."""
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_note_folder_pinned_updated "
+        "ON note (folder_id, pinned, updated_at)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_note_pinned_updated "
+        "ON note (pinned, updated_at)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_note_updated_id "
+        "ON note (updated_at, id)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_note_reminder_at "
+        "ON note (reminder_at)"
+    )
+
+
+def _add_note_body_digest(conn: Connection):
+    """Store a keyed digest of each body to detect unchanged saves."""
+    conn.exec_driver_sql("ALTER TABLE note ADD COLUMN body_digest BLOB")
+
+
+def _add_data_keys(conn: Connection):
+    """Add wrapped data keys for envelope encryption."""
+    conn.exec_driver_sql(
+        """
+        CREATE TABLE IF NOT EXISTS data_key (
+            id INTEGER NOT NULL,
+            wrapped_key BLOB NOT NULL,
+            master_key_id VARCHAR(32) NOT NULL,
+            created_at DATETIME NOT NULL,
+            PRIMARY KEY (id)
+        )
+        """
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_data_key_master_key_id "
+        "ON data_key (master_key_id)"
+    )
+    conn.exec_driver_sql(
+        "ALTER TABLE note ADD COLUMN data_key_id INTEGER REFERENCES data_key (id)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_note_data_key_id ON note (data_key_id)"
+    )
+
+
+def _add_note_text(conn: Connection):
+    """Store an encrypted plain-text copy of each body for search."""
+    conn.exec_driver_sql("ALTER TABLE note ADD COLUMN text_enc BLOB")
+
+
+def _add_note_change_counter(conn: Connection):
+    """Count note changes so derived data (the search snapshot) can catch up.
+
+    Triggers bump a single-row counter on every insert, delete and title or
+    text change, and stamp changed rows with the new value.
+    """
+    conn.exec_driver_sql(
+        """
+        CREATE TABLE IF NOT EXISTS note_change_counter (
+            id INTEGER NOT NULL CHECK (id = 1),
+            seq INTEGER NOT NULL,
+            PRIMARY KEY (id)
+        )
+        """
+    )
+    conn.exec_driver_sql(
+        "INSERT OR IGNORE INTO note_change_counter (id, seq) VALUES (1, 0)"
+    )
+    conn.exec_driver_sql(
+        "ALTER TABLE note ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_note_change_seq ON note (change_seq)"
+    )
+    conn.exec_driver_sql(
+        """
+        CREATE TRIGGER IF NOT EXISTS note_change_insert AFTER INSERT ON note
+        BEGIN
+            UPDATE note_change_counter SET seq = seq + 1 WHERE id = 1;
+            UPDATE note SET change_seq = (SELECT seq FROM note_change_counter)
+            WHERE id = NEW.id;
+        END
+        """
+    )
+    conn.exec_driver_sql(
+        """
+        CREATE TRIGGER IF NOT EXISTS note_change_update
+        AFTER UPDATE OF title, text_enc ON note
+        BEGIN
+            UPDATE note_change_counter SET seq = seq + 1 WHERE id = 1;
+            UPDATE note SET change_seq = (SELECT seq FROM note_change_counter)
+            WHERE id = NEW.id;
+        END
+        """
+    )
+    conn.exec_driver_sql(
+        """
+        CREATE TRIGGER IF NOT EXISTS note_change_delete AFTER DELETE ON note
+        BEGIN
+            UPDATE note_change_counter SET seq = seq + 1 WHERE id = 1;
+        END
+        """
+    )
+
+
+def _add_note_tokens(conn: Connection):
+    """Add keyed token digests (the optional blind index) for SQL prefiltering.
+
+    Triggers drop a note's digests whenever its title or text changes or it
+    is deleted; the service re-derives them on demand.
+    """
+    conn.exec_driver_sql(
+        """
+        CREATE TABLE IF NOT EXISTS note_token (
+            token BLOB NOT NULL,
+            note_id CHAR(32) NOT NULL,
+            PRIMARY KEY (token, note_id),
+            FOREIGN KEY(note_id) REFERENCES note (id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_note_token_note_id ON note_token (note_id)"
+    )
+    conn.exec_driver_sql(
+        """
+        CREATE TRIGGER IF NOT EXISTS note_token_update
+        AFTER UPDATE OF title, text_enc ON note
+        BEGIN
+            DELETE FROM note_token WHERE note_id = OLD.id;
+        END
+        """
+    )
+    conn.exec_driver_sql(
+        """
+        CREATE TRIGGER IF NOT EXISTS note_token_delete AFTER DELETE ON note
+        BEGIN
+            DELETE FROM note_token WHERE note_id = OLD.id;
+        END
+        """
+    )
+
+
+# Ordered (version, description, step) entries. Steps must never be edited
+# once released; add a new entry instead.
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create base tables", _create_base_tables),
+    (2, "add note indexes", _add_note_indexes),
+    (3, "add note body digest", _add_note_body_digest),
+    (4, "add data keys", _add_data_keys),
+    (5, "add note plain text", _add_note_text),
+    (6, "add note change counter", _add_note_change_counter),
+    (7, "add note token digests", _add_note_tokens),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: Connection) -> int:
+    """Read current schema version (0 for an unversioned database)."""
+    try:
+        version = conn.exec_driver_sql(
+            "SELECT version FROM schema_version"
+        ).scalar()
+    except OperationalError:
+        return 0
+    return version or 0
+
+
+def migrate(engine: Engine) -> int:
+    """Apply pending migrations and return the resulting schema version."""
+    # Fast path: a single read when the schema is already current
+    with engine.connect() as conn:
+        version = get_schema_version(conn)
+    if version >= LATEST_VERSION:
+        return version
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"
+        )
+        # Re-read inside the transaction in case another process migrated
+        version = get_schema_version(conn)
+
+        for step_version, _description, step in MIGRATIONS:
+            if step_version <= version:
+                continue
+            step(conn)
+            version = step_version
+
+        conn.exec_driver_sql("DELETE FROM schema_version")
+        conn.exec_driver_sql(
+            "INSERT INTO schema_version (version) VALUES (?)", (version,)
+        )
+
+    return version
+
+
+def drop_schema(engine: Engine):
+    """Drop all tables, including the schema version table."""
+    with engine.begin() as conn:
+        tables = conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        ).scalars().all()
+        for table in tables:
+            conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{table}"')
@@ -0,0 +1,142 @@
+"""Write-behind autosave queue for note edits."""
+
+import threading
+from typing import Any, Dict, List, Optional, Set
+from uuid import UUID
+from PySide6.QtCore import QObject, Signal
+
+
+class AutosaveService(QObject):
+    """Coalesces note edits and persists them on a background writer thread.
+
+    A failed batch goes back in the queue, under any newer edits to the
+    same notes, and is retried with exponential backoff; saveFailed is
+    emitted when a run of failures starts. Stopping makes one final
+    attempt.
+    """
+
+    notesSaved = Signal(list)  # List[UUID] written in one transaction
+    saveFailed = Signal(list, str)  # List[UUID], error message
+
+    RETRY_DELAY = 1.0  # Seconds before the first retry; doubles per failure
+    MAX_RETRY_DELAY = 30.0
+
+    def __init__(self, note_service, delay: float = 0.25):
+        super().__init__()
+        self.note_service = note_service
+        self.delay = delay  # Seconds to wait for more edits before writing
+
+        self._pending: Dict[UUID, Dict[str, Any]] = {}
+        self._in_flight = False
+        self._discarded: Set[UUID] = set()  # Discarded while in flight; not re-queued
+        self._flush_requested = False
+        self._retry_delay = 0.0  # Non-zero after a failed write
+        self._write_failed = False  # Last write failed; ends a flush
+        self._running = True
+        self._condition = threading.Condition()
+
+        self.writer_thread = threading.Thread(
+            target=self._run_writer,
+            daemon=True
+        )
+        self.writer_thread.start()
+
+    def enqueue(self, note_id: UUID, **fields):
+        """Queue an edit; later edits to the same note replace earlier ones."""
+        with self._condition:
+            self._pending.setdefault(note_id, {}).update(fields)
+            self._condition.notify_all()
+
+    def discard(self, note_id: UUID):
+        """Drop queued edits for a note (e.g. before deleting it)."""
+        with self._condition:
+            self._pending.pop(note_id, None)
+            if self._in_flight:
+                self._discarded.add(note_id)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write queued edits now and wait until they are persisted.
+
+        Returns False if the write failed (the edits stay queued) or the
+        timeout passed.
+        """
+        with self._condition:
+            if self._pending:
+                self._flush_requested = True
+                self._write_failed = False
+                self._condition.notify_all()
+            self._condition.wait_for(
+                lambda: not self._in_flight and (not self._pending or self._write_failed),
+                timeout
+            )
+            return not self._pending and not self._in_flight
+
+    def stop(self, timeout: Optional[float] = None):
+        """Flush queued edits and stop the writer thread."""
+        self.flush(timeout)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self.writer_thread.join(timeout)
+
+    def _run_writer(self):
+        """Write coalesced batches until stopped."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or not self._running)
+                if not self._pending:
+                    return
+
+                # Give further keystrokes a chance to coalesce into this
+                # batch, or back off after a failed write
+                self._condition.wait_for(
+                    lambda: self._flush_requested or not self._running,
+                    self._retry_delay or self.delay
+                )
+
+                batch = self._pending
+                self._pending = {}
+                self._in_flight = True
+
+            written = False
+            try:
+                written = self._write_batch(batch)
+            finally:
+                with self._condition:
+                    if not written:
+                        # Newer edits to the same notes win over the failed ones
+                        for note_id, fields in batch.items():
+                            if note_id not in self._discarded:
+                                self._pending[note_id] = {
+                                    **fields, **self._pending.get(note_id, {})
+                                }
+                    self._discarded.clear()
+                    self._in_flight = False
+                    self._write_failed = not written
+                    if not self._pending or not written:
+                        self._flush_requested = False
+                    self._condition.notify_all()
+
+            if not written and not self._running:
+                return  # Final attempt failed; the edits were reported
+
+    def _write_batch(self, batch: Dict[UUID, Dict[str, Any]]) -> bool:
+        """Persist one batch and report the outcome; False if it failed."""
+        updates: List[Dict[str, Any]] = [
+            {"id": note_id, **fields} for note_id, fields in batch.items()
+        ]
+        try:
+            saved = self.note_service.update_notes(updates)
+        except Exception as e:
+            with self._condition:
+                first_failure = not self._retry_delay
+                self._retry_delay = min(
+                    self._retry_delay * 2 or self.RETRY_DELAY, self.MAX_RETRY_DELAY
+                )
+            if first_failure:
+                self.saveFailed.emit(list(batch), str(e))
+            return False
+        with self._condition:
+            self._retry_delay = 0.0
+        self.notesSaved.emit(saved)
+        return True
@@ -0,0 +1,126 @@
+"""Blind index: keyed trigram digests that let SQLite prefilter notes."""
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from math import ceil
+from typing import Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+from sqlalchemy import func, insert, intersect, select as core_select
+from sqlmodel import Session, select
+from ..crypto.encryption import encryption_service
+from ..models.base import Note, NoteToken, Settings
+from .search_index import SearchIndex, tokenize, trigrams
+
+
+class BlindIndex:
+    """Stores HMAC digests of each note's word trigrams in note_token.
+
+    A query token becomes the digests of its trigrams; notes holding at
+    least MIN_GRAM_OVERLAP of them are found by an indexed lookup, so a
+    search decrypts only those notes. This is a superset of the notes the
+    in-memory SearchIndex would consider, which then scores them.
+
+    Digests are keyed with a random key of their own, kept encrypted in
+    the settings table rather than derived from the master key, so master
+    key rotation leaves them valid. Digests still reveal which notes share
+    trigrams and how often; the index is optional for that reason.
+
+    Every indexed note also gets a MARKER row. Triggers drop a note's rows
+    when its title or text changes and NoteService stores fresh ones after
+    each write, so notes without a marker are only those saved before the
+    index was enabled (see NoteService.backfill_blind_index).
+    """
+
+    KEY_SETTING = "blind_index_key"
+    DIGEST_SIZE = 8  # Bytes kept per HMAC; collisions only add candidates
+    MARKER = bytes(DIGEST_SIZE)
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._key: Optional[bytes] = None
+        self._key_lock = threading.Lock()
+
+    def note_digests(self, title: str, text: str) -> Set[bytes]:
+        """Digests of every trigram in a note's title and text, plus MARKER."""
+        key = self.key
+        grams = set()
+        for token in tokenize(title) | tokenize(text):
+            grams |= trigrams(token)
+        return {self._digest(key, gram) for gram in grams} | {self.MARKER}
+
+    def add_many(self, notes: Iterable[Tuple[UUID, str, str]]):
+        """Store digests for (note id, title, text) entries."""
+        rows = [
+            {"token": token, "note_id": note_id}
+            for note_id, title, text in notes
+            for token in self.note_digests(title, text)
+        ]
+        if not rows:
+            return
+        with Session(self.engine) as session:
+            session.execute(insert(NoteToken).prefix_with("OR IGNORE"), rows)
+            session.commit()
+
+    def missing_ids(self, limit: Optional[int] = None) -> List[UUID]:
+        """Ids of notes whose digests are not stored, at most limit of them."""
+        marked = select(NoteToken.note_id).where(NoteToken.token == self.MARKER)
+        statement = select(Note.id).where(Note.id.not_in(marked)).limit(limit)
+        with Session(self.engine) as session:
+            return list(session.exec(statement))
+
+    def candidate_ids(self, query: str) -> Optional[Set[UUID]]:
+        """Ids of notes that may match every query token.
+
+        Returns None when the query has no token long enough to filter on.
+        """
+        key = self.key
+        table = NoteToken.__table__
+        selects = []
+        for token in tokenize(query):
+            if len(token) < 2:
+                continue
+            grams = trigrams(token, pad_end=False)
+            needed = ceil(len(grams) * SearchIndex.MIN_GRAM_OVERLAP)
+            selects.append(
+                core_select(table.c.note_id)
+                .where(table.c.token.in_([self._digest(key, gram) for gram in grams]))
+                .group_by(table.c.note_id)
+                .having(func.count() >= needed)
+            )
+        if not selects:
+            return None
+
+        statement = selects[0] if len(selects) == 1 else intersect(*selects)
+        with Session(self.engine) as session:
+            return set(session.execute(statement).scalars())
+
+    @property
+    def key(self) -> bytes:
+        """The digest key, loaded from settings and created on first use."""
+        with self._key_lock:
+            if self._key is None:
+                with Session(self.engine) as session:
+                    setting = session.get(Settings, self.KEY_SETTING)
+                    if setting is None:
+                        session.execute(
+                            insert(Settings).prefix_with("OR IGNORE").values(
+                                key=self.KEY_SETTING,
+                                value_enc=encryption_service.encrypt_json(
+                                    base64.b64encode(os.urandom(32)).decode()
+                                )
+                            )
+                        )
+                        session.commit()
+                        # Another process may have created it first
+                        setting = session.get(Settings, self.KEY_SETTING)
+                    self._key = base64.b64decode(
+                        encryption_service.decrypt_json(setting.value_enc)
+                    )
+            return self._key
+
+    def _digest(self, key: bytes, gram: str) -> bytes:
+        """Truncated HMAC-SHA256 of a trigram."""
+        return hmac.new(key, gram.encode(), hashlib.sha256).digest()[:self.DIGEST_SIZE]
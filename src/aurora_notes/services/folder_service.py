@@ -3,14 +3,14 @@
 from typing import List, Optional
 from uuid import UUID
 from sqlmodel import Session, select
-from ..models.base import Folder, create_db_engine
+from ..models.base import Folder, get_engine
 
 
 class FolderService:
     """Handles folder operations."""
     
-    def __init__(self):
-        self.engine = create_db_engine()
+    def __init__(self, db_path: Optional[str] = None):
+        self.engine = get_engine(db_path)
     
     def create_folder(self, name: str) -> Optional[Folder]:
         """Create new folder."""
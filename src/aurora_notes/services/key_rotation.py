@@ -0,0 +1,65 @@
+"""Master key rotation by re-wrapping data keys."""
+
+from typing import Callable, Dict, Optional
+from sqlmodel import Session, select
+from ..models.base import Settings
+from ..crypto.encryption import encryption_service
+from .key_store import DataKeyStore
+
+
+class KeyRotationJob:
+    """Rotates the master key without rewriting note bodies.
+    
+    Bodies are sealed with data keys, so rotation only re-wraps the rows of
+    the data_key table, batch by batch. Notes and settings still sealed
+    directly with the master key are first moved onto data keys (a one-time
+    cost). The next key is kept in the keychain until the job finishes, so
+    running the job again after an interruption resumes where it stopped.
+    """
+    
+    def __init__(self, note_service, batch_size: int = 500):
+        self.note_service = note_service
+        self.key_store = DataKeyStore(note_service.engine)
+        self.batch_size = batch_size
+    
+    def run(self, progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+        """Rotate the master key, returning counts of rows processed per step."""
+        next_key_id = encryption_service.begin_rotation()
+        
+        counts = {
+            "notes": self.note_service.reencrypt_legacy_notes(self.batch_size),
+            "settings": self._reencrypt_settings(),
+            "data_keys": 0,
+        }
+        if progress:
+            progress("notes", counts["notes"])
+        
+        for batch in self.key_store.iter_not_wrapped_by(next_key_id, self.batch_size):
+            self.key_store.update_wrapped([
+                (
+                    data_key.id,
+                    encryption_service.rewrap_data_key(
+                        data_key.wrapped_key, data_key.master_key_id
+                    ),
+                    next_key_id,
+                )
+                for data_key in batch
+            ])
+            counts["data_keys"] += len(batch)
+            if progress:
+                progress("data_keys", counts["data_keys"])
+        
+        encryption_service.finish_rotation()
+        return counts
+    
+    def _reencrypt_settings(self) -> int:
+        """Re-seal every settings value under a data key (the table is small)."""
+        with Session(self.note_service.engine) as session:
+            settings = session.exec(select(Settings)).all()
+            for setting in settings:
+                setting.value_enc = encryption_service.encrypt(
+                    encryption_service.decrypt(setting.value_enc)
+                )
+                session.add(setting)
+            session.commit()
+            return len(settings)
@@ -0,0 +1,61 @@
+"""Persistence for wrapped data encryption keys."""
+
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy import update
+from sqlmodel import Session, select
+from ..models.base import DataKey
+
+
+class DataKeyStore:
+    """Stores data keys, wrapped by the master key, in the data_key table."""
+    
+    def __init__(self, engine):
+        self.engine = engine
+    
+    def add(self, wrapped_key: bytes, master_key_id: str) -> int:
+        """Store a wrapped data key and return its id."""
+        with Session(self.engine) as session:
+            data_key = DataKey(wrapped_key=wrapped_key, master_key_id=master_key_id)
+            session.add(data_key)
+            session.commit()
+            return data_key.id
+    
+    def get(self, key_id: int) -> Optional[Tuple[bytes, str]]:
+        """Get (wrapped key, master key id) for a data key."""
+        with Session(self.engine) as session:
+            data_key = session.get(DataKey, key_id)
+            if data_key:
+                return data_key.wrapped_key, data_key.master_key_id
+            return None
+    
+    def iter_not_wrapped_by(
+        self,
+        master_key_id: str,
+        batch_size: int = 500
+    ) -> Iterator[List[DataKey]]:
+        """Yield batches of data keys wrapped by any other master key."""
+        last_id = 0
+        while True:
+            with Session(self.engine) as session:
+                batch = session.exec(
+                    select(DataKey)
+                    .where(DataKey.master_key_id != master_key_id, DataKey.id > last_id)
+                    .order_by(DataKey.id)
+                    .limit(batch_size)
+                ).all()
+            
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1].id
+    
+    def update_wrapped(self, rows: List[Tuple[int, bytes, str]]):
+        """Replace wrapped keys for (id, wrapped key, master key id) rows atomically."""
+        if not rows:
+            return
+        with Session(self.engine) as session:
+            session.execute(update(DataKey), [
+                {"id": key_id, "wrapped_key": wrapped_key, "master_key_id": master_key_id}
+                for key_id, wrapped_key, master_key_id in rows
+            ])
+            session.commit()
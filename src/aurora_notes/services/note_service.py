@@ -1,18 +1,37 @@
 """Note CRUD service layer."""
 
+import os
+import threading
 from datetime import datetime
-from typing import List, Optional
-from uuid import UUID
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+from uuid import UUID, uuid4
+from sqlalchemy import bindparam, delete, func, insert, tuple_, update
+from sqlalchemy.orm import defer
 from sqlmodel import Session, select
-from ..models.base import Note, create_db_engine
+from ..models.base import Note, NoteHeader, get_engine
 from ..crypto.encryption import encryption_service
+from ..utils.html_text import html_to_text
+from .blind_index import BlindIndex
+from .search_index import SearchIndex
+from .search_snapshot import load_snapshot, read_snapshot_seq, save_snapshot
 
 
 class NoteService:
     """Handles note operations with encryption."""
     
-    def __init__(self):
-        self.engine = create_db_engine()
+    PAGE_SIZE = 500  # Default rows per keyset page when streaming
+    BATCH_SIZE = 500  # Max ids per IN (...) clause, below SQLite's variable limit
+    BLIND_INDEX = False  # Keep keyed token digests to search before the index loads
+    
+    def __init__(self, db_path: Optional[str] = None):
+        self.engine = get_engine(db_path)
+        # Kept in step with every create/update/delete made through this service
+        self.search_index = SearchIndex()
+        self._build_lock = threading.Lock()  # One full index build at a time
+        self.search_snapshot_path = os.path.join(
+            os.path.dirname(self.engine.url.database), "search_index.snap"
+        )
+        self.blind_index = BlindIndex(self.engine) if self.BLIND_INDEX else None
     
     def create_note(
         self,
@@ -23,10 +42,15 @@ class NoteService:
         reminder_at: Optional[datetime] = None
     ) -> Note:
         """Create encrypted note."""
+        text = html_to_text(body)
+        body_enc, text_enc = encryption_service.encrypt_many([body, text])
         with Session(self.engine) as session:
             note = Note(
                 title=title,
-                body_enc=encryption_service.encrypt(body),
+                body_enc=body_enc,
+                body_digest=encryption_service.digest(body),
+                text_enc=text_enc,
+                data_key_id=encryption_service.data_key_id(body_enc),
                 folder_id=folder_id,
                 pinned=pinned,
                 reminder_at=reminder_at
@@ -34,7 +58,10 @@ class NoteService:
             session.add(note)
             session.commit()
             session.refresh(note)
-            return note
+        
+        self.search_index.add(note.id, title, text)
+        self._store_digests([(note.id, title, text)])
+        return note
     
     def update_note(
         self,
@@ -45,51 +72,519 @@ class NoteService:
         pinned: Optional[bool] = None,
         reminder_at: Optional[datetime] = None
     ) -> Optional[Note]:
-        """Update note with encryption."""
+        """Update note with encryption.
+        
+        Only changed fields are written, in a single UPDATE; if nothing
+        changed the note is returned untouched and updated_at is kept.
+        The stored body is not read (digests tell whether it changed), so
+        the returned note only carries body_enc if it was rewritten.
+        """
         with Session(self.engine) as session:
-            note = session.get(Note, note_id)
+            note = session.get(Note, note_id, options=[defer(Note.body_enc)])
             if not note:
                 return None
+            session.expunge(note)
+        
+        values = self._changed_values(note, {
+            "title": title,
+            "body": body,
+            "folder_id": folder_id,
+            "pinned": pinned,
+            "reminder_at": reminder_at,
+        })
+        if not values:
+            return note
+        
+        with Session(self.engine) as session:
+            session.execute(update(Note).where(Note.id == note_id).values(**values))
+            session.commit()
+        
+        if "body_enc" in values:
+            _invalidate_cached([note_id])
+        self._reindex([(note, values, body)])
+        
+        for field, value in values.items():
+            setattr(note, field, value)
+        return note
+    
+    def create_notes(self, notes: Iterable[Dict[str, Any]]) -> List[UUID]:
+        """Create many encrypted notes in a single transaction.
+        
+        Each item takes the same keys as ``create_note`` (title, body and
+        optionally folder_id, pinned, reminder_at). Returns the new ids in
+        input order.
+        """
+        notes = list(notes)
+        bodies = [item.get("body", "") for item in notes]
+        texts = [html_to_text(body) for body in bodies]
+        encrypted = encryption_service.encrypt_many(bodies + texts)
+        
+        now = datetime.utcnow()
+        rows = []
+        for item, body, body_enc, text_enc in zip(
+            notes, bodies, encrypted, encrypted[len(bodies):]
+        ):
+            rows.append({
+                "id": uuid4(),
+                "title": item["title"],
+                "body_enc": body_enc,
+                "body_digest": encryption_service.digest(body),
+                "text_enc": text_enc,
+                "data_key_id": encryption_service.data_key_id(body_enc),
+                "created_at": now,
+                "updated_at": now,
+                "pinned": item.get("pinned", False),
+                "reminder_at": item.get("reminder_at"),
+                "folder_id": item.get("folder_id"),
+            })
+        
+        if rows:
+            with Session(self.engine) as session:
+                session.execute(insert(Note), rows)
+                session.commit()
+        
+        for row, text in zip(rows, texts):
+            self.search_index.add(row["id"], row["title"], text)
+        self._store_digests((row["id"], row["title"], text) for row, text in zip(rows, texts))
+        return [row["id"] for row in rows]
+    
+    def update_notes(self, updates: Iterable[Dict[str, Any]]) -> List[UUID]:
+        """Update many notes in a single transaction.
+        
+        Each item needs an ``id`` plus any of the fields accepted by
+        ``update_note``; ``body`` is encrypted. Notes whose fields are all
+        unchanged are not written. Notes deleted meanwhile are skipped
+        without failing the rest. Returns ids of the notes that exist.
+        """
+        updates = {item["id"]: item for item in updates}
+        if not updates:
+            return []
+        
+        with Session(self.engine) as session:
+            current = {}
+            for chunk in _chunks(list(updates), self.BATCH_SIZE):
+                statement = select(
+                    Note.id, Note.title, Note.body_digest, Note.text_enc,
+                    Note.folder_id, Note.pinned, Note.reminder_at
+                ).where(Note.id.in_(chunk))
+                current.update((row.id, row) for row in session.exec(statement))
+        
+        # One executemany per set of changed columns
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for note_id, row in current.items():
+            values = self._changed_values(row, updates[note_id])
+            if values:
+                groups.setdefault(tuple(sorted(values)), []).append(
+                    {"note_id": note_id, **values}
+                )
+        
+        rows = []
+        if groups:
+            table = Note.__table__
+            with Session(self.engine) as session:
+                for group in groups.values():
+                    session.execute(
+                        table.update().where(table.c.id == bindparam("note_id")), group
+                    )
+                # The write lock is held, so deletions have all landed by now
+                note_ids = [row["note_id"] for group in groups.values() for row in group]
+                existing = set()
+                for chunk in _chunks(note_ids, self.BATCH_SIZE):
+                    existing.update(session.exec(select(Note.id).where(Note.id.in_(chunk))))
+                session.commit()
             
-            if title is not None:
-                note.title = title
-            if body is not None:
-                note.body_enc = encryption_service.encrypt(body)
-            if folder_id is not None:
-                note.folder_id = folder_id
-            if pinned is not None:
-                note.pinned = pinned
-            if reminder_at is not None:
-                note.reminder_at = reminder_at
+            for note_id in set(note_ids) - existing:
+                del current[note_id]
+            rows = [row for group in groups.values() for row in group if row["note_id"] in existing]
+        
+        _invalidate_cached(row["note_id"] for row in rows if "body_enc" in row)
+        self._reindex(
+            (current[row["note_id"]], row, updates[row["note_id"]].get("body")) for row in rows
+        )
+        return [note_id for note_id in updates if note_id in current]
+    
+    def reencrypt_legacy_notes(self, batch_size: Optional[int] = None) -> int:
+        """Re-encrypt bodies sealed directly with the master key under data keys.
+        
+        The plain-text copy is rewritten alongside. Runs in batches, one
+        transaction each, and can be interrupted and resumed. Notes saved
+        meanwhile already use a data key and are left alone. Requires a
+        key store attached to ``encryption_service``. Returns the number of
+        notes re-encrypted.
+        """
+        batch_size = batch_size or self.BATCH_SIZE
+        total = 0
+        while True:
+            with Session(self.engine) as session:
+                batch = session.exec(
+                    select(Note.id, Note.title, Note.body_enc)
+                    .where(Note.data_key_id.is_(None))
+                    .limit(batch_size)
+                ).all()
+            if not batch:
+                return total
             
-            note.updated_at = datetime.utcnow()
-            session.add(note)
+            bodies = encryption_service.decrypt_many(row.body_enc for row in batch)
+            texts = [html_to_text(body) for body in bodies]
+            encrypted = encryption_service.encrypt_many(bodies + texts)
+            key_ids = [encryption_service.data_key_id(body_enc) for body_enc in encrypted]
+            if None in key_ids:
+                raise RuntimeError("Envelope encryption is not enabled")
+            
+            table = Note.__table__
+            with Session(self.engine) as session:
+                session.execute(
+                    table.update()
+                    .where(table.c.id == bindparam("note_id"), table.c.data_key_id.is_(None))
+                    .values(
+                        body_enc=bindparam("body"),
+                        text_enc=bindparam("text"),
+                        data_key_id=bindparam("key_id")
+                    ),
+                    [
+                        {"note_id": row.id, "body": body_enc, "text": text_enc, "key_id": key_id}
+                        for row, body_enc, text_enc, key_id in zip(
+                            batch, encrypted, encrypted[len(batch):], key_ids
+                        )
+                    ]
+                )
+                session.commit()
+            
+            _invalidate_cached(row.id for row in batch)
+            # Rewriting text_enc dropped the digests; the plain text is unchanged
+            self._store_digests(
+                (row.id, row.title, text) for row, text in zip(batch, texts)
+            )
+            total += len(batch)
+    
+    def backfill_blind_index(self, batch_size: Optional[int] = None) -> int:
+        """Store blind index digests for notes saved before it was enabled.
+        
+        Runs in batches and can be interrupted and resumed. Notes written
+        meanwhile are digested by the write itself. Returns the number of
+        notes digested.
+        """
+        batch_size = batch_size or self.BATCH_SIZE
+        total = 0
+        while True:
+            note_ids = self.blind_index.missing_ids(batch_size)
+            if not note_ids:
+                return total
+            notes = self._get_notes_without_body(note_ids)
+            self.blind_index.add_many(
+                (note.id, note.title, text)
+                for note, text in zip(notes, self._decrypt_texts(notes))
+            )
+            total += len(notes)
+    
+    def move_notes(self, note_ids: Iterable[UUID], folder_id: Optional[UUID]) -> int:
+        """Move notes to a folder (``None`` unfiles them). Returns rows changed."""
+        return self._bulk_set(note_ids, folder_id=folder_id)
+    
+    def set_notes_pinned(self, note_ids: Iterable[UUID], pinned: bool) -> int:
+        """Pin or unpin many notes. Returns rows changed."""
+        return self._bulk_set(note_ids, pinned=pinned)
+    
+    def delete_notes(self, note_ids: Iterable[UUID]) -> int:
+        """Delete many notes in a single transaction. Returns rows deleted."""
+        note_ids = list(note_ids)
+        deleted = 0
+        with Session(self.engine) as session:
+            for chunk in _chunks(note_ids, self.BATCH_SIZE):
+                result = session.execute(delete(Note).where(Note.id.in_(chunk)))
+                deleted += result.rowcount
             session.commit()
-            session.refresh(note)
-            return note
+        
+        _invalidate_cached(note_ids)
+        for note_id in note_ids:
+            self.search_index.remove(note_id)
+        return deleted
+    
+    def _changed_values(self, current, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Column values for the requested fields that differ from ``current``.
+        
+        Bodies are compared by keyed digest so unchanged ones are never
+        re-encrypted; a changed body also refreshes its plain-text copy.
+        Includes a new updated_at when anything changed.
+        """
+        values = {}
+        for field in ("title", "folder_id", "pinned", "reminder_at"):
+            value = fields.get(field)
+            if value is not None and value != getattr(current, field):
+                values[field] = value
+        
+        body = fields.get("body")
+        if body is not None:
+            digest = encryption_service.digest(body)
+            if digest != current.body_digest:
+                body_enc, text_enc = encryption_service.encrypt_many(
+                    [body, html_to_text(body)]
+                )
+                values["body_enc"] = body_enc
+                values["body_digest"] = digest
+                values["text_enc"] = text_enc
+                values["data_key_id"] = encryption_service.data_key_id(body_enc)
+        
+        if values:
+            values["updated_at"] = datetime.utcnow()
+        return values
+    
+    def _reindex(self, changes: Iterable[tuple[Any, Dict[str, Any], Optional[str]]]):
+        """Update the search indexes after writes of changed column values.
+        
+        Takes (note as it was, changed values, new body) per written note.
+        The write dropped the blind index digests of renamed or edited
+        notes; renamed ones need their stored text decrypted to redo them.
+        """
+        digests = []
+        renamed = []
+        for current, values, body in changes:
+            if "title" not in values and "body_enc" not in values:
+                continue
+            text = html_to_text(body) if "body_enc" in values else None
+            self.search_index.update(current.id, title=values.get("title"), text=text)
+            title = values.get("title", current.title)
+            if text is not None:
+                digests.append((current.id, title, text))
+            else:
+                renamed.append((current, title))
+        
+        if self.blind_index and renamed:
+            texts = self._decrypt_texts([current for current, _ in renamed])
+            digests.extend(
+                (current.id, title, text)
+                for (current, title), text in zip(renamed, texts)
+            )
+        self._store_digests(digests)
+    
+    def _store_digests(self, notes: Iterable[tuple[UUID, str, str]]):
+        """Store blind index digests for (id, title, text), if it is enabled."""
+        if self.blind_index:
+            self.blind_index.add_many(notes)
+    
+    def _bulk_set(self, note_ids: Iterable[UUID], **values) -> int:
+        """Set the same column values on many notes in one transaction."""
+        values["updated_at"] = datetime.utcnow()
+        changed = 0
+        with Session(self.engine) as session:
+            for chunk in _chunks(list(note_ids), self.BATCH_SIZE):
+                result = session.execute(
+                    update(Note).where(Note.id.in_(chunk)).values(**values)
+                )
+                changed += result.rowcount
+            session.commit()
+        return changed
     
     def get_note(self, note_id: UUID) -> Optional[tuple[Note, str]]:
         """Get note with decrypted body."""
         with Session(self.engine) as session:
             note = session.get(Note, note_id)
             if note:
-                body = encryption_service.decrypt(note.body_enc)
+                body = encryption_service.decrypt_cached(note.id, note.body_enc)
                 return note, body
             return None
     
+    def get_notes(self, note_ids: Iterable[UUID]) -> List[tuple[Note, str]]:
+        """Get many notes with decrypted bodies, in input order.
+        
+        One query and one parallel decrypt batch per BATCH_SIZE ids;
+        ids of missing notes are skipped.
+        """
+        note_ids = list(note_ids)
+        found = {}
+        for chunk in _chunks(note_ids, self.BATCH_SIZE):
+            statement = select(Note).where(Note.id.in_(chunk))
+            found.update((note.id, (note, body)) for note, body in self._fetch_decrypted(statement))
+        return [found[note_id] for note_id in note_ids if note_id in found]
+    
     def get_all_notes(self, folder_id: Optional[UUID] = None) -> List[tuple[Note, str]]:
-        """Get all notes with decrypted bodies."""
-        with Session(self.engine) as session:
+        """Get all notes with decrypted bodies, pinned first."""
+        return self._fetch_decrypted(self._listing_statement(folder_id))
+    
+    def iter_notes(
+        self,
+        folder_id: Optional[UUID] = None,
+        page_size: Optional[int] = None
+    ) -> Iterator[tuple[Note, str]]:
+        """Stream notes ordered by (updated_at, id) in keyset pages.
+        
+        Each page is read in its own short session and bodies are decrypted
+        one at a time as the caller advances, so memory stays flat however
+        many notes exist.
+        """
+        for page in self._iter_pages(folder_id, page_size):
+            for note in page:
+                yield note, encryption_service.decrypt_cached(note.id, note.body_enc)
+    
+    def _iter_pages(
+        self,
+        folder_id: Optional[UUID] = None,
+        page_size: Optional[int] = None,
+        load_body: bool = True
+    ) -> Iterator[List[Note]]:
+        """Yield lists of notes in (updated_at, id) keyset pages.
+        
+        With load_body=False body_enc is not read; accessing it on the
+        returned (detached) notes raises.
+        """
+        page_size = page_size or self.PAGE_SIZE
+        last_key = None
+        
+        while True:
             statement = select(Note)
+            if not load_body:
+                statement = statement.options(defer(Note.body_enc))
             if folder_id:
                 statement = statement.where(Note.folder_id == folder_id)
+            if last_key is not None:
+                statement = statement.where(
+                    tuple_(Note.updated_at, Note.id) > tuple_(*last_key)
+                )
+            statement = statement.order_by(Note.updated_at, Note.id).limit(page_size)
+            
+            with Session(self.engine) as session:
+                page = session.exec(statement).all()
+            
+            if page:
+                yield page
             
+            if len(page) < page_size:
+                return
+            last_key = (page[-1].updated_at, page[-1].id)
+    
+    def list_note_headers(self, folder_id: Optional[UUID] = None) -> List[NoteHeader]:
+        """Get note metadata for listings without loading or decrypting bodies."""
+        statement = self._listing_statement(folder_id, columns=NoteHeader._fields)
+        with Session(self.engine) as session:
+            return [NoteHeader(*row) for row in session.exec(statement)]
+    
+    def get_upcoming_reminders(
+        self,
+        after: Optional[datetime] = None,
+        preview_chars: Optional[int] = None
+    ) -> List[tuple[Note, str]]:
+        """Get notes with a reminder after the given time, soonest first.
+        
+        With preview_chars the start of each note's plain text is returned
+        instead of the body, decrypting only as much as needed.
+        """
+        statement = self._reminders_statement(after)
+        if preview_chars is None:
+            return self._fetch_decrypted(statement)
+        
+        with Session(self.engine) as session:
+            notes = session.exec(statement).all()
+        
+        missing = [note.id for note in notes if note.text_enc is None]
+        texts = self._backfill_texts(missing) if missing else {}
+        return [
+            (
+                note,
+                texts[note.id][:preview_chars] if note.id in texts
+                else encryption_service.decrypt_prefix(note.text_enc, preview_chars)
+            )
+            for note in notes
+        ]
+    
+    def _listing_statement(
+        self,
+        folder_id: Optional[UUID] = None,
+        columns: Optional[Sequence[str]] = None
+    ):
+        """Build pinned-first, most recently updated listing query.
+        
+        Served by ix_note_folder_pinned_updated / ix_note_pinned_updated.
+        Pass column names to select only those instead of full rows.
+        """
+        if columns:
+            statement = select(*(getattr(Note, name) for name in columns))
+        else:
+            statement = select(Note)
+        if folder_id:
+            statement = statement.where(Note.folder_id == folder_id)
+        return statement.order_by(Note.pinned.desc(), Note.updated_at.desc())
+    
+    def _reminders_statement(self, after: Optional[datetime] = None):
+        """Build upcoming reminders query served by ix_note_reminder_at."""
+        if after is None:
+            after = datetime.utcnow()
+        return (
+            select(Note)
+            .where(Note.reminder_at > after)
+            .order_by(Note.reminder_at)
+        )
+    
+    def _iter_text_pages(self, folder_id: Optional[UUID] = None) -> Iterator[tuple[Note, str]]:
+        """Stream notes with their plain text, one keyset page per batch.
+        
+        Bodies are not loaded; texts are decrypted as one parallel batch.
+        """
+        for page in self._iter_pages(folder_id, load_body=False):
+            yield from zip(page, self._decrypt_texts(page))
+    
+    def _decrypt_texts(self, notes: Sequence[Note]) -> List[str]:
+        """Plain text of each note, deriving it for notes saved without one."""
+        stored = [note for note in notes if note.text_enc is not None]
+        texts = dict(zip(
+            (note.id for note in stored),
+            encryption_service.decrypt_many_cached(
+                (_text_cache_key(note.id) for note in stored),
+                (note.text_enc for note in stored)
+            )
+        ))
+        
+        missing = [note.id for note in notes if note.text_enc is None]
+        if missing:
+            texts.update(self._backfill_texts(missing))
+        return [texts[note.id] for note in notes]
+    
+    def _backfill_texts(self, note_ids: List[UUID]) -> Dict[UUID, str]:
+        """Derive and store plain text for notes saved before it existed.
+        
+        Rows whose text was written concurrently are left alone.
+        """
+        with Session(self.engine) as session:
+            rows = []
+            for chunk in _chunks(note_ids, self.BATCH_SIZE):
+                rows.extend(session.exec(
+                    select(Note.id, Note.title, Note.body_enc).where(Note.id.in_(chunk))
+                ))
+        
+        bodies = encryption_service.decrypt_many_cached(
+            (row.id for row in rows),
+            (row.body_enc for row in rows)
+        )
+        texts = {row.id: html_to_text(body) for row, body in zip(rows, bodies)}
+        if not texts:
+            return texts
+        
+        encrypted = encryption_service.encrypt_many(texts.values())
+        table = Note.__table__
+        with Session(self.engine) as session:
+            session.execute(
+                table.update()
+                .where(table.c.id == bindparam("note_id"), table.c.text_enc.is_(None))
+                .values(text_enc=bindparam("text")),
+                [
+                    {"note_id": note_id, "text": text_enc}
+                    for note_id, text_enc in zip(texts, encrypted)
+                ]
+            )
+            session.commit()
+        
+        # Writing text_enc dropped the digests
+        self._store_digests((row.id, row.title, texts[row.id]) for row in rows)
+        return texts
+    
+    def _fetch_decrypted(self, statement) -> List[tuple[Note, str]]:
+        """Run note query and decrypt each body."""
+        with Session(self.engine) as session:
             notes = session.exec(statement).all()
-            result = []
-            for note in notes:
-                body = encryption_service.decrypt(note.body_enc)
-                result.append((note, body))
-            return result
+        bodies = encryption_service.decrypt_many_cached(
+            (note.id for note in notes),
+            (note.body_enc for note in notes)
+        )
+        return list(zip(notes, bodies))
     
     def delete_note(self, note_id: UUID) -> bool:
         """Delete note."""
@@ -98,25 +593,214 @@ class NoteService:
             if note:
                 session.delete(note)
                 session.commit()
+                _invalidate_cached([note_id])
+                self.search_index.remove(note_id)
                 return True
             return False
     
-    def search_notes(self, query: str) -> List[tuple[Note, str, float]]:
-        """Search notes using fuzzy matching."""
-        from rapidfuzz import fuzz
+    def build_search_index(self):
+        """Load every note's title and plain text into the search index.
+        
+        Restores the last saved snapshot when there is one and re-indexes
+        only notes changed since; otherwise decrypts each note's text once.
+        The build runs on a separate index without blocking writes; once
+        it is swapped in, notes written meanwhile are re-indexed by their
+        change counter. Afterwards the index is maintained incrementally.
+        """
+        with self._build_lock:
+            self._build_search_index()
+    
+    def _ensure_search_index(self):
+        """Build the search index if no build has loaded it yet."""
+        with self._build_lock:
+            if not self.search_index.ready:
+                self._build_search_index()
+    
+    def _build_search_index(self):
+        """Build into a new index, then swap it in and replay later writes."""
+        built = SearchIndex()
+        current = self._change_seq()
+        snapshot_seq = read_snapshot_seq(self.search_snapshot_path)
+        data = None
+        if snapshot_seq is not None and snapshot_seq <= current:
+            data = load_snapshot(self.search_snapshot_path)
+        if data is not None:
+            built.restore(data)
+            self._sync_search_index(built, current)
+        else:
+            built.load(
+                (note.id, note.title, text) for note, text in self._iter_text_pages()
+            )
+            built.change_seq = current
+        
+        with self.search_index.lock:
+            self.search_index.replace(built)
+            self._sync_search_index(self.search_index, self._change_seq())
+    
+    def save_search_index(self):
+        """Write the search index to its snapshot file if it has changed.
         
-        all_notes = self.get_all_notes()
-        results = []
+        Catches up with the change counter first, so the snapshot matches
+        the database at the counter value it records.
+        """
+        index = self.search_index
+        with index.lock:
+            if not index.ready or not index.modified:
+                return
+            self._sync_search_index(index, self._change_seq())
+            data = index.snapshot()
+        save_snapshot(self.search_snapshot_path, data)
+    
+    def _change_seq(self) -> int:
+        """Current value of the note change counter."""
+        with self.engine.connect() as conn:
+            return conn.exec_driver_sql(
+                "SELECT seq FROM note_change_counter WHERE id = 1"
+            ).scalar() or 0
+    
+    def _sync_search_index(self, index: SearchIndex, current: int):
+        """Bring an index up to the given change counter value.
         
-        for note, body in all_notes:
-            # Score based on title and body
-            title_score = fuzz.partial_ratio(query.lower(), note.title.lower())
-            body_score = fuzz.partial_ratio(query.lower(), body.lower())
-            combined_score = max(title_score, body_score * 0.8)
+        Notes stamped after the index's counter are re-indexed; deletions
+        leave no row behind, so ids are reconciled whenever the counts
+        differ.
+        """
+        with Session(self.engine) as session:
+            changed = session.exec(
+                select(Note)
+                .options(defer(Note.body_enc))
+                .where(Note.change_seq > index.change_seq)
+            ).all()
+            for note, text in zip(changed, self._decrypt_texts(changed)):
+                index.add(note.id, note.title, text)
             
-            if combined_score > 60:  # Threshold
-                results.append((note, body, combined_score))
+            total = session.exec(select(func.count()).select_from(Note)).one()
+            if total != len(index):
+                existing = set(session.exec(select(Note.id)).all())
+                for note_id in index.note_ids() - existing:
+                    index.remove(note_id)
+                missing = list(existing - index.note_ids())
+                for chunk in _chunks(missing, self.BATCH_SIZE):
+                    notes = session.exec(
+                        select(Note)
+                        .options(defer(Note.body_enc))
+                        .where(Note.id.in_(chunk))
+                    ).all()
+                    for note, text in zip(notes, self._decrypt_texts(notes)):
+                        index.add(note.id, note.title, text)
+        index.change_seq = current
+    
+    def search_notes(
+        self,
+        query: str,
+        limit: Optional[int] = None
+    ) -> List[tuple[NoteHeader, str, float]]:
+        """Search notes using fuzzy matching.
+        
+        Candidates come from the in-memory search index (built on first
+        use) and are scored there in batches, so queries decrypt nothing;
+        only the best ``limit`` matches (all of them by default) are read
+        back, and only their header columns. Returns (header, plain text,
+        score) tuples, best first, equal scores by note id.
+        """
+        return [
+            result
+            for batch in self.iter_search_results(query, limit)
+            for result in batch
+        ]
+    
+    def iter_search_results(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+        offset: int = 0
+    ) -> Iterator[List[tuple[NoteHeader, str, float]]]:
+        """Yield search_notes() results in ranked batches, best batch first.
+        
+        Headers are read back one batch at a time, so a caller that stops
+        early (e.g. because the query changed) skips the remaining reads.
+        The best ``offset`` of the ``limit`` matches are skipped unread, so
+        a caller paging through results passes the count it already has.
+        Scoring stops, and nothing is yielded, once cancelled() is true.
+        With the blind index enabled, the in-memory index is not loaded;
+        each query decrypts only the blind index's candidates instead, and
+        only queries too short to prefilter load the full index.
+        """
+        index = self.search_index
+        if not index.ready:
+            index = self._blind_search_index(query) if self.blind_index else None
+            if index is None:
+                self._ensure_search_index()
+                index = self.search_index
+        
+        matches = index.search(query, limit, cancelled)[offset:]
+        if cancelled is not None and cancelled():
+            return
+        for chunk in _chunks(matches, batch_size or self.BATCH_SIZE):
+            headers = {header.id: header for header in self._get_note_headers(
+                [note_id for note_id, _, _ in chunk]
+            )}
+            yield [
+                (headers[note_id], text, score)
+                for note_id, text, score in chunk
+                if note_id in headers
+            ]
+    
+    def _blind_search_index(self, query: str) -> Optional[SearchIndex]:
+        """A search index of just the blind index's candidates for a query.
         
-        # Sort by score descending
-        results.sort(key=lambda x: x[2], reverse=True)
-        return results  
\ No newline at end of file
+        Notes not yet digested by backfill_blind_index are not found.
+        Returns None when the query is too short to prefilter.
+        """
+        note_ids = self.blind_index.candidate_ids(query)
+        if note_ids is None:
+            return None
+        notes = self._get_notes_without_body(list(note_ids))
+        index = SearchIndex()
+        index.load(
+            (note.id, note.title, text)
+            for note, text in zip(notes, self._decrypt_texts(notes))
+        )
+        return index
+    
+    def _get_note_headers(self, note_ids: List[UUID]) -> List[NoteHeader]:
+        """Load note headers by id, selecting only their columns."""
+        columns = [getattr(Note, name) for name in NoteHeader._fields]
+        headers = []
+        with Session(self.engine) as session:
+            for chunk in _chunks(note_ids, self.BATCH_SIZE):
+                headers.extend(
+                    NoteHeader(*row)
+                    for row in session.exec(select(*columns).where(Note.id.in_(chunk)))
+                )
+        return headers
+    
+    def _get_notes_without_body(self, note_ids: List[UUID]) -> List[Note]:
+        """Load notes by id with body_enc deferred."""
+        notes = []
+        with Session(self.engine) as session:
+            for chunk in _chunks(note_ids, self.BATCH_SIZE):
+                notes.extend(session.exec(
+                    select(Note).options(defer(Note.body_enc)).where(Note.id.in_(chunk))
+                ))
+        return notes
+
+
+def _text_cache_key(note_id: UUID) -> tuple:
+    """Body cache key for a note's plain text."""
+    return ("text", note_id)
+
+
+def _invalidate_cached(note_ids: Iterable[UUID]):
+    """Drop cached bodies and plain texts for notes that changed."""
+    for note_id in note_ids:
+        encryption_service.body_cache.invalidate(note_id)
+        encryption_service.body_cache.invalidate(_text_cache_key(note_id))
+
+
+def _chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    """Split a list into consecutive chunks of at most ``size`` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
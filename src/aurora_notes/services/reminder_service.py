@@ -75,21 +75,18 @@ class ReminderService(QObject):
     
     def reschedule_all_reminders(self, note_service):
         """Reschedule all reminders on app start."""
-        from ..services.note_service import NoteService
-        
-        notes = note_service.get_all_notes()
-        now = datetime.utcnow()
+        # One extra character tells whether the preview was truncated
+        notes = note_service.get_upcoming_reminders(datetime.utcnow(), preview_chars=51)
         
         for note, body in notes:
-            if note.reminder_at and note.reminder_at > now:
-                # Extract first 50 chars as preview
-                body_preview = body[:50] + "..." if len(body) > 50 else body
-                self.schedule_reminder(
-                    note.id,
-                    note.reminder_at,
-                    note.title,
-                    body_preview
-                )
+            # Extract first 50 chars as preview
+            body_preview = body[:50] + "..." if len(body) > 50 else body
+            self.schedule_reminder(
+                note.id,
+                note.reminder_at,
+                note.title,
+                body_preview
+            )
     
     def shutdown(self):
         """Shutdown scheduler."""
@@ -0,0 +1,442 @@
+"""In-memory search index over note titles and plain text."""
+
+import heapq
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from math import ceil
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """Distinct lowercase word tokens of a string."""
+    return frozenset(_TOKEN_RE.findall(text.lower()))
+
+
+def trigrams(token: str, pad_end: bool = True) -> Set[str]:
+    """Trigrams of a token padded at the start (and optionally the end).
+
+    Query tokens are not end-padded, so a prefix matches all its trigrams.
+    """
+    padded = f" {token} " if pad_end else f" {token}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Token postings with a trigram index over the vocabulary.
+
+    Holds each note's title and plain text in memory so queries never touch
+    the database or decrypt anything. A query token matches every indexed
+    word sharing at least MIN_GRAM_OVERLAP of its trigrams (prefixes, small
+    typos and mid-word substrings of three or more characters included);
+    candidates are the notes matching every query token. Two-character
+    tokens have a single start-padded trigram, so they only match word
+    prefixes ("me" finds "meeting", "et" does not). All methods are
+    thread-safe; a large build can run on a separate index that is then
+    swapped in with ``replace``.
+
+    Titles and texts are also kept in rapidfuzz's preprocessed form
+    (lowercase, punctuation stripped) so queries score them as-is.
+
+    Candidate sets of recent queries are cached by token set (LRU,
+    MAX_CACHED_QUERIES) until the next change to the index. A query that
+    adds words to a cached one, as when typing "meeting" then "meeting
+    agenda", only filters that query's candidates by the new words; one
+    that extends a cached query's word, as when typing "meet" then
+    "meeti", filters that query's candidates by the longer word.
+
+    ``snapshot`` and ``restore`` convert the index to and from plain data
+    so it can be saved between launches (see search_snapshot).
+    """
+
+    MIN_GRAM_OVERLAP = 0.5
+    MIN_SCORE = 60  # Results must score above this
+    BODY_WEIGHT = 0.8  # Text matches count for less than title matches
+    MAX_CACHED_QUERIES = 64
+    SCORE_BATCH = 20000  # Choices per scoring call; cancellation is checked between them
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.ready = False  # Set once every note has been loaded
+        self.change_seq = 0  # Note changes up to this counter value are reflected
+        self.modified = False  # Changed since loaded or snapshotted
+        # Notes are numbered internally; int sets hash far faster than UUIDs
+        self._next_doc = 0
+        self._doc_numbers: Dict[UUID, int] = {}
+        self._note_ids: Dict[int, UUID] = {}
+        self._documents: Dict[int, Tuple[str, str]] = {}
+        self._processed: Dict[int, Tuple[str, str]] = {}
+        self._tokens: Dict[int, FrozenSet[str]] = {}  # Only for notes added, not restored
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._vocabulary: Dict[str, Set[str]] = defaultdict(set)
+        self._query_cache: "OrderedDict[FrozenSet[str], Set[int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, note_id: UUID) -> bool:
+        return note_id in self._doc_numbers
+
+    def note_ids(self) -> Set[UUID]:
+        """Ids of every indexed note."""
+        with self.lock:
+            return set(self._doc_numbers)
+
+    def load(self, documents: Iterable[Tuple[UUID, str, str]]):
+        """Replace the index contents with (note id, title, text) entries."""
+        with self.lock:
+            self.clear()
+            for note_id, title, text in documents:
+                self.add(note_id, title, text)
+            self.ready = True
+
+    def add(self, note_id: UUID, title: str, text: str):
+        """Index a note, replacing any previous entry."""
+        with self.lock:
+            self.remove(note_id)
+            tokens = tokenize(title) | tokenize(text)
+            self._query_cache.clear()
+            self.modified = True
+
+            doc = self._next_doc
+            self._next_doc += 1
+            self._doc_numbers[note_id] = doc
+            self._note_ids[doc] = note_id
+            self._documents[doc] = (title, text)
+            self._processed[doc] = (default_process(title), default_process(text))
+            self._tokens[doc] = tokens
+            for token in tokens:
+                postings = self._postings[token]
+                if not postings:
+                    for gram in trigrams(token):
+                        self._vocabulary[gram].add(token)
+                postings.add(doc)
+
+    def update(self, note_id: UUID, title: Optional[str] = None, text: Optional[str] = None):
+        """Re-index a note with a new title and/or text.
+
+        Notes not yet indexed are skipped unless both are given; the next
+        load picks them up.
+        """
+        with self.lock:
+            doc = self._doc_numbers.get(note_id)
+            if doc is None and (title is None or text is None):
+                return
+            current = self._documents.get(doc, (None, None))
+            self.add(
+                note_id,
+                current[0] if title is None else title,
+                current[1] if text is None else text
+            )
+
+    def remove(self, note_id: UUID):
+        """Drop a note from the index."""
+        with self.lock:
+            doc = self._doc_numbers.pop(note_id, None)
+            if doc is None:
+                return
+            self._query_cache.clear()
+            self.modified = True
+
+            title, text = self._documents.pop(doc)
+            tokens = self._tokens.pop(doc, None)
+            if tokens is None:  # Restored from a snapshot
+                tokens = tokenize(title) | tokenize(text)
+            del self._note_ids[doc]
+            del self._processed[doc]
+            for token in tokens:
+                postings = self._postings[token]
+                postings.discard(doc)
+                if not postings:
+                    del self._postings[token]
+                    for gram in trigrams(token):
+                        words = self._vocabulary[gram]
+                        words.discard(token)
+                        if not words:
+                            del self._vocabulary[gram]
+
+    def clear(self):
+        """Drop every entry."""
+        with self.lock:
+            self.ready = False
+            self.modified = True
+            self._doc_numbers.clear()
+            self._note_ids.clear()
+            self._documents.clear()
+            self._processed.clear()
+            self._tokens.clear()
+            self._postings.clear()
+            self._vocabulary.clear()
+            self._query_cache.clear()
+
+    def replace(self, other: "SearchIndex"):
+        """Take over the contents of an index built separately.
+
+        Lets a full build run without holding ``lock``; other must not be
+        used afterwards.
+        """
+        with self.lock:
+            for name in (
+                "ready", "change_seq", "modified", "_next_doc", "_doc_numbers",
+                "_note_ids", "_documents", "_processed", "_tokens", "_postings",
+                "_vocabulary",
+            ):
+                setattr(self, name, getattr(other, name))
+            self._query_cache.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the index as JSON-serialisable data for ``restore``."""
+        with self.lock:
+            self.modified = False
+            return {
+                "change_seq": self.change_seq,
+                "next_doc": self._next_doc,
+                "documents": [
+                    [doc, self._note_ids[doc].hex, title, text]
+                    for doc, (title, text) in self._documents.items()
+                ],
+                "postings": {
+                    token: list(docs) for token, docs in self._postings.items()
+                },
+            }
+
+    def restore(self, data: Dict[str, Any]):
+        """Replace the index contents with ``snapshot`` data.
+
+        Postings are rebuilt as sets straight from the stored lists rather
+        than by re-tokenising every note. Per-note tokens are not restored,
+        so refinements intersect postings instead of filtering by them.
+        """
+        with self.lock:
+            self.clear()
+            for doc, note_hex, title, text in data["documents"]:
+                note_id = UUID(note_hex)
+                self._doc_numbers[note_id] = doc
+                self._note_ids[doc] = note_id
+                self._documents[doc] = (title, text)
+                self._processed[doc] = (default_process(title), default_process(text))
+            for token, docs in data["postings"].items():
+                self._postings[token] = set(docs)
+                for gram in trigrams(token):
+                    self._vocabulary[gram].add(token)
+            self._next_doc = data["next_doc"]
+            self.change_seq = data["change_seq"]
+            self.modified = False
+            self.ready = True
+
+    def candidates(self, query: str) -> List[Tuple[UUID, str, str]]:
+        """Return (note id, title, text) for notes that may match the query.
+
+        Single-character tokens are too unselective to filter on; a query
+        made only of those returns every note.
+        """
+        with self.lock:
+            return [
+                (self._note_ids[doc], *self._documents[doc])
+                for doc in self._candidate_ids(query)
+            ]
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        cancelled: Optional[Callable[[], bool]] = None
+    ) -> List[Tuple[UUID, str, float]]:
+        """Return up to limit (note id, text, score) matches, best first.
+
+        A note scores the better of its title score and its weighted text
+        score, using fuzz.partial_ratio. Candidates are scored in batches in
+        native code, across all cores when numpy is available; a top-k heap
+        picks the results. Equal scores are ordered by note id, so results
+        are stable. If cancelled() turns true between batches, the search
+        stops and returns no matches.
+        """
+        query = default_process(query)
+        with self.lock:
+            docs = list(self._candidate_ids(query))
+            note_ids = [self._note_ids[doc] for doc in docs]
+            titles = [self._processed[doc][0] for doc in docs]
+            texts = [self._processed[doc][1] for doc in docs]
+            originals = [self._documents[doc][1] for doc in docs]
+
+        cancelled = cancelled or (lambda: False)
+        title_scores = self._batch_scores(query, titles, self.MIN_SCORE, cancelled)
+        text_scores = self._batch_scores(
+            query, texts, self.MIN_SCORE / self.BODY_WEIGHT, cancelled
+        )
+        if cancelled():
+            return []
+
+        hits = (
+            (max(title_scores.get(i, 0), text_scores.get(i, 0) * self.BODY_WEIGHT), i)
+            for i in title_scores.keys() | text_scores.keys()
+        )
+        # Best score first, then note id
+        hits = [(-score, note_ids[i], i) for score, i in hits if score > self.MIN_SCORE]
+        if limit is None:
+            top = sorted(hits)
+        else:
+            top = heapq.nsmallest(limit, hits)
+        return [(note_id, originals[i], float(-score)) for score, note_id, i in top]
+
+    def _batch_scores(
+        self,
+        query: str,
+        choices: List[str],
+        cutoff: float,
+        cancelled: Callable[[], bool]
+    ) -> Dict[int, float]:
+        """partial_ratio of query against each choice, keeping those >= cutoff.
+
+        Scores SCORE_BATCH choices at a time and stops early once cancelled.
+        """
+        results = {}
+        for start in range(0, len(choices), self.SCORE_BATCH):
+            if cancelled():
+                break
+            batch = choices[start:start + self.SCORE_BATCH]
+            if numpy is not None:
+                scores = process.cdist(
+                    [query], batch,
+                    scorer=fuzz.partial_ratio,
+                    score_cutoff=cutoff,
+                    workers=-1
+                )[0]
+                results.update(
+                    (start + int(i), float(scores[i])) for i in numpy.flatnonzero(scores)
+                )
+            else:
+                results.update(
+                    (start + index, score)
+                    for _, score, index in process.extract(
+                        query, batch,
+                        scorer=fuzz.partial_ratio,
+                        score_cutoff=cutoff,
+                        limit=None
+                    )
+                )
+        return results
+
+    def _candidate_ids(self, query: str) -> Iterable[int]:
+        """Numbers of notes matching every query token; caller holds the lock.
+
+        Candidates are the intersection of each token's matches, so a query
+        holding every token of a cached one starts from that query's
+        candidates and applies only its extra tokens. A query extending one
+        token of a cached query refines it with _refine_prefix.
+        """
+        tokens = frozenset(token for token in tokenize(query) if len(token) >= 2)
+        if not tokens:
+            return self._documents.keys()
+
+        cached = self._query_cache.get(tokens)
+        if cached is not None:
+            self._query_cache.move_to_end(tokens)
+            return cached
+
+        prefix_base = self._prefix_base(tokens)
+        if prefix_base is not None:
+            return self._cache_query(tokens, self._refine_prefix(tokens, *prefix_base))
+
+        base = self._refinement_base(tokens)
+        matched = None if base is None else self._query_cache[base]
+        for token in tokens - (base or frozenset()):
+            words = self._similar_words(token)
+            if matched is None:
+                matched = set().union(*(self._postings[word] for word in words))
+            elif len(self._tokens) == len(self._documents):
+                # Filtering a known set is cheaper than intersecting postings
+                matched = {
+                    doc for doc in matched
+                    if not self._tokens[doc].isdisjoint(words)
+                }
+            else:
+                matched = matched.intersection(
+                    set().union(*(self._postings[word] for word in words))
+                )
+            if not matched:
+                break
+
+        return self._cache_query(tokens, matched)
+
+    def _cache_query(self, tokens: FrozenSet[str], matched: Set[int]) -> Set[int]:
+        """Cache a query's candidates, evicting the least recently used."""
+        self._query_cache[tokens] = matched
+        if len(self._query_cache) > self.MAX_CACHED_QUERIES:
+            self._query_cache.popitem(last=False)
+        return matched
+
+    def _refinement_base(self, tokens: FrozenSet[str]) -> Optional[FrozenSet[str]]:
+        """The cached token set with the most tokens that tokens extends."""
+        subsets = [cached for cached in self._query_cache if cached < tokens]
+        if not subsets:
+            return None
+        return max(subsets, key=len)
+
+    def _prefix_base(
+        self,
+        tokens: FrozenSet[str]
+    ) -> Optional[Tuple[FrozenSet[str], str, str]]:
+        """The latest cached token set differing from tokens by one prefix.
+
+        Returns (cached tokens, prefix, token extending it), as when
+        "meeting bu" is cached and "meeting bud" is typed.
+        """
+        for cached in reversed(self._query_cache):
+            if len(cached) != len(tokens):
+                continue
+            removed, added = cached - tokens, tokens - cached
+            if len(removed) == 1 and len(added) == 1:
+                (prefix,), (token,) = removed, added
+                if token.startswith(prefix):
+                    return cached, prefix, token
+        return None
+
+    def _refine_prefix(
+        self,
+        tokens: FrozenSet[str],
+        base: FrozenSet[str],
+        prefix: str,
+        token: str
+    ) -> Set[int]:
+        """Candidates for tokens from those of base, where token extends prefix.
+
+        Matching is by trigram overlap, so the longer token can match words
+        the prefix did not ("meeting" matches "greeting", "mee" does not).
+        Base candidates are intersected with the postings of the words both
+        match, and only notes holding one of the token's new words are
+        checked against the other tokens, so the result equals matching
+        tokens in full. Postings are combined as whole sets, which beats
+        filtering large candidate sets note by note.
+        """
+        words = self._similar_words(token)
+        new_words = words - self._similar_words(prefix)
+        matched = self._query_cache[base].intersection(
+            set().union(*(self._postings[word] for word in words - new_words))
+        )
+        added = set().union(*(self._postings[word] for word in new_words))
+        for other in tokens - {token}:
+            if not added:
+                break
+            added &= set().union(*(self._postings[word] for word in self._similar_words(other)))
+        return matched | added
+
+    def _similar_words(self, token: str) -> Set[str]:
+        """Indexed words similar to the token; caller holds the lock."""
+        grams = trigrams(token, pad_end=False)
+        counts: Counter = Counter()
+        for gram in grams:
+            counts.update(self._vocabulary.get(gram, ()))
+
+        needed = ceil(len(grams) * self.MIN_GRAM_OVERLAP)
+        return {word for word, count in counts.items() if count >= needed}
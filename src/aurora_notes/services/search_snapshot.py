@@ -0,0 +1,84 @@
+"""Encrypted on-disk snapshots of the search index.
+
+A snapshot lets the next launch restore the index without decrypting every
+note. The file is a small clear header followed by the encrypted JSON form
+of ``SearchIndex.snapshot()``:
+
+    magic (4 bytes) | version (u16) | change_seq (u64) | ciphertext
+
+The header's change_seq is repeated inside the ciphertext, so a tampered
+header is detected once decrypted. Bump SNAPSHOT_VERSION whenever the
+payload layout or tokenisation changes; older snapshots are then ignored
+and the index is rebuilt.
+"""
+
+import mmap
+import os
+import struct
+from typing import Any, Dict, Optional
+from ..crypto.encryption import encryption_service
+
+SNAPSHOT_MAGIC = b"ANSI"
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct(">4sHQ")
+
+
+def save_snapshot(path: str, data: Dict[str, Any]):
+    """Encrypt and write snapshot data, replacing any previous file atomically."""
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, data["change_seq"])
+    encrypted = encryption_service.encrypt_json(data)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(encrypted)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot_seq(path: str) -> Optional[int]:
+    """Change counter a snapshot was taken at, without decrypting it.
+
+    Returns None if there is no usable snapshot of the current version.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(header) < _HEADER.size:
+        return None
+    magic, version, change_seq = _HEADER.unpack(header)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        return None
+    return change_seq
+
+
+def load_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    """Decrypt a snapshot file, or return None if it is missing or unusable.
+
+    The file is memory-mapped and decrypted in place rather than read into
+    a separate buffer first.
+    """
+    change_seq = read_snapshot_seq(path)
+    if change_seq is None:
+        return None
+
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)[_HEADER.size:]
+            try:
+                data = encryption_service.decrypt_json(view)
+            finally:
+                view.release()
+    except Exception as e:
+        print(f"Ignoring search snapshot: {e}")
+        return None
+
+    if not isinstance(data, dict) or data.get("change_seq") != change_seq:
+        print("Ignoring search snapshot: header does not match contents")
+        return None
+    return data
+
@@ -0,0 +1,120 @@
+"""Background search with cancellation and streamed results."""
+
+import threading
+from typing import Optional
+from PySide6.QtCore import QObject, Signal
+
+
+class SearchWorker(QObject):
+    """Runs note searches on a worker thread, newest query first.
+    
+    Each request gets a generation number. Starting a new search cancels
+    the one in flight: it stops at its next scoring or read-back batch
+    boundary and its results are never emitted. Results arrive in ranked batches via resultsReady,
+    followed by an empty batch with final=True once the search completes.
+    Each search returns one page of the best matches; moreAvailable tells
+    the caller to request the next page by searching again from an offset.
+    """
+    
+    resultsReady = Signal(int, list, bool)  # generation, [(header, text, score)], final
+    moreAvailable = Signal(int)  # generation; emitted before final when the page is full
+    searchFailed = Signal(int, str)  # generation, error message
+    
+    BATCH_SIZE = 25  # Results per streamed batch
+    PAGE_SIZE = 100  # Results per search request
+    
+    def __init__(self, note_service):
+        super().__init__()
+        self.note_service = note_service
+        
+        self._generation = 0
+        self._query: Optional[str] = None
+        self._offset = 0
+        self._running = True
+        self._condition = threading.Condition()
+        
+        self.worker_thread = threading.Thread(
+            target=self._run_worker,
+            daemon=True
+        )
+        self.worker_thread.start()
+    
+    @property
+    def generation(self) -> int:
+        """Generation of the latest request."""
+        return self._generation
+    
+    def search(self, query: str, offset: int = 0) -> int:
+        """Start a search, cancelling any in flight. Returns its generation.
+        
+        Results start at the offset-th best match, so a caller that has
+        shown a page of results passes their count to fetch the next.
+        """
+        with self._condition:
+            self._generation += 1
+            self._query = query
+            self._offset = offset
+            self._condition.notify_all()
+            return self._generation
+    
+    def cancel(self):
+        """Cancel the search in flight (and any queued one)."""
+        with self._condition:
+            self._generation += 1
+            self._query = None
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Cancel pending work and stop the worker thread."""
+        with self._condition:
+            self._generation += 1
+            self._query = None
+            self._running = False
+            self._condition.notify_all()
+        self.worker_thread.join(timeout)
+    
+    def _is_current(self, generation: int) -> bool:
+        """Whether a search is still the latest request."""
+        return generation == self._generation and self._running
+    
+    def _run_worker(self):
+        """Run requested searches until stopped."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._query is not None or not self._running)
+                if not self._running:
+                    return
+                
+                generation = self._generation
+                query = self._query
+                offset = self._offset
+                self._query = None
+            
+            self._run_search(generation, query, offset)
+    
+    def _run_search(self, generation: int, query: str, offset: int = 0):
+        """Stream one page of a search's results until done or superseded."""
+        batches = self.note_service.iter_search_results(
+            query,
+            limit=offset + self.PAGE_SIZE,
+            batch_size=self.BATCH_SIZE,
+            cancelled=lambda: not self._is_current(generation),
+            offset=offset
+        )
+        count = 0
+        try:
+            for batch in batches:
+                if not self._is_current(generation):
+                    return
+                count += len(batch)
+                self.resultsReady.emit(generation, batch, False)
+            
+            if self._is_current(generation):
+                if count >= self.PAGE_SIZE:
+                    self.moreAvailable.emit(generation)
+                self.resultsReady.emit(generation, [], True)
+        except Exception as e:
+            print(f"Search failed: {e}")
+            if self._is_current(generation):
+                self.searchFailed.emit(generation, str(e))
+        finally:
+            batches.close()
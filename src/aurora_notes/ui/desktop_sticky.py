@@ -23,6 +23,7 @@ from PySide6.QtGui import (
 )
 
 from ..models.base import Note
+from ..utils.html_canonical import expand_html, minify_html
 
 
 class DesktopStickyNote(QWidget):
@@ -159,7 +160,7 @@ class DesktopStickyNote(QWidget):
         
         # Content editor
         self.editor = QTextEdit()
-        self.editor.setHtml(content)
+        self.editor.setHtml(expand_html(content))
         self.editor.textChanged.connect(self._on_text_changed)
         self.editor.setContextMenuPolicy(Qt.CustomContextMenu)
         self.editor.customContextMenuRequested.connect(self._show_context_menu)
@@ -620,7 +621,7 @@ class DesktopStickyNote(QWidget):
     
     def _save_content(self):
         """Emit signal to save content."""
-        current_content = self.editor.toHtml()
+        current_content = self.get_content()
         current_title = self.title_edit.toPlainText()
         
         if current_content != self._last_content or current_title != self._last_title:
@@ -629,21 +630,28 @@ class DesktopStickyNote(QWidget):
             self.note.title = current_title
             self.contentChanged.emit()
     
-    def _toggle_pin(self):
-        """Toggle pin status."""
-        self.note.pinned = not self.note.pinned
+    def set_pinned(self, pinned: bool):
+        """Apply a pinned state changed elsewhere, without saving it."""
+        self.note.pinned = pinned
         
         # Update button icon
         self._update_pin_icon()
         
-        # Update window flags
+        # Update window flags; changing them hides the window
+        visible = self.isVisible()
         flags = self.windowFlags()
-        if self.note.pinned:
+        if pinned:
             flags |= Qt.WindowStaysOnTopHint
         else:
             flags &= ~Qt.WindowStaysOnTopHint
         
         self.setWindowFlags(flags)
+        if visible:
+            self.show()
+    
+    def _toggle_pin(self):
+        """Toggle pin status."""
+        self.set_pinned(not self.note.pinned)
         self.show()
         self.contentChanged.emit()
 
@@ -777,8 +785,8 @@ class DesktopStickyNote(QWidget):
         menu.exec(self.editor.mapToGlobal(pos))
     
     def get_content(self) -> str:
-        """Get current content as HTML."""
-        return self.editor.toHtml()
+        """Get current content as compact canonical HTML for storage."""
+        return minify_html(self.editor.toHtml())
     
     def get_title(self) -> str:
         """Get current title."""
@@ -4,11 +4,11 @@
 import sys
 from typing import Dict, List, Optional
 from uuid import UUID
-from PySide6.QtCore import Qt, QTimer, Slot, QPoint, QSettings
+from PySide6.QtCore import Qt, QTimer, Signal, Slot, QPoint, QSettings
 from PySide6.QtWidgets import (
     QMainWindow, QToolBar, QMenuBar, QMenu, QSystemTrayIcon,
     QVBoxLayout, QWidget, QListWidget, QListWidgetItem,
-    QMessageBox, QApplication
+    QMessageBox, QApplication, QAbstractItemView
 )
 from PySide6.QtGui import QIcon, QCloseEvent, QAction, QPixmap, QPainter, QBrush, QColor
 
@@ -16,7 +16,10 @@ from .desktop_sticky import DesktopStickyNote
 from .folder_dock import FolderDock
 from .search_bar import SearchBar
 from .dialogs import HotkeyDialog, ThemeDialog
+from ..crypto.encryption import encryption_service
 from ..services.note_service import NoteService
+from ..services.autosave_service import AutosaveService
+from ..services.search_worker import SearchWorker
 from ..services.folder_service import FolderService
 from ..services.theme_service import ThemeService
 from ..services.hotkey_service import HotkeyService
@@ -26,6 +29,8 @@ from ..services.reminder_service import ReminderService
 class MainWindow(QMainWindow):
     """Main window - acts as a note manager, not container."""
     
+    keyReady = Signal(bool)  # Background key fetch ended; True if a key loaded
+    
     def __init__(self):
         super().__init__()
         
@@ -34,6 +39,8 @@ class MainWindow(QMainWindow):
         
         # Services
         self.note_service = NoteService()
+        self.autosave_service = AutosaveService(self.note_service)
+        self.search_worker = SearchWorker(self.note_service)
         self.folder_service = FolderService()
         self.theme_service = ThemeService()
         self.hotkey_service = HotkeyService()
@@ -41,6 +48,11 @@ class MainWindow(QMainWindow):
         
         # Track sticky windows
         self.sticky_windows: Dict[UUID, DesktopStickyNote] = {}
+        self._visible_note_ids: List[UUID] = []  # Reopened once the key is loaded
+        # Search shown in the list; the next page is fetched on scrolling to the end
+        self._search_query: Optional[str] = None
+        self._search_shown = 0
+        self._search_more = False
         self.settings = QSettings("Aurora", "AuroraNotes")
         
         # Initialize UI
@@ -74,11 +86,15 @@ class MainWindow(QMainWindow):
         
         # Note list
         self.note_list = QListWidget()
+        self.note_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.note_list.itemDoubleClicked.connect(self._show_note)
         self.note_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.note_list.customContextMenuRequested.connect(
             self._show_note_context_menu
         )
+        self.note_list.verticalScrollBar().valueChanged.connect(
+            self._on_note_list_scrolled
+        )
         layout.addWidget(self.note_list)
         
         self.setCentralWidget(central)
@@ -224,26 +240,65 @@ class MainWindow(QMainWindow):
         self.hotkey_service.hotkeyPressed.connect(self._on_hotkey_pressed)
         self.hotkey_service.register_hotkey(default_hotkey, self._on_hotkey_pressed)
         
-        # Reminder service
+        # Autosave service
+        self.autosave_service.saveFailed.connect(self._on_save_failed)
+        
+        # Search worker
+        self.search_worker.resultsReady.connect(self._on_search_results)
+        self.search_worker.moreAvailable.connect(self._on_more_search_results)
+        self.search_worker.searchFailed.connect(self._on_search_failed)
+        
+        # Reminder service; reminders are rescheduled once the key is loaded
         self.reminder_service.reminderTriggered.connect(self._show_reminder)
-        self.reminder_service.reschedule_all_reminders(self.note_service)
+        
+        # Emitted from the keychain thread, so queued onto the GUI thread
+        self.keyReady.connect(self._on_key_ready)
         
         # Apply default theme
         self.theme_service.apply_theme("cozy-parchment")
     
     def _load_notes(self):
-        """Load all notes."""
-        notes = self.note_service.get_all_notes()
+        """List all notes; windows needing bodies wait for the key."""
+        headers = self.note_service.list_note_headers()
         
-        for note, body in notes:
-            # Add to list
-            item = QListWidgetItem(note.title)
-            item.setData(Qt.UserRole, note.id)
+        for header in headers:
+            item = QListWidgetItem(header.title)
+            item.setData(Qt.UserRole, header.id)
             self.note_list.addItem(item)
-            
-            # Create sticky window if it was visible
-            if self.settings.value(f"note_visible_{note.id}", True, bool):
-                self._create_sticky_window(note, body, show=True)
+        
+        self._visible_note_ids = [
+            header.id for header in headers
+            if self.settings.value(f"note_visible_{header.id}", True, bool)
+        ]
+        encryption_service.when_ready(self.keyReady.emit)
+        QTimer.singleShot(
+            int(encryption_service.KEYCHAIN_TIMEOUT * 1000),
+            self._check_key_ready
+        )
+    
+    def _check_key_ready(self):
+        """Report a keychain that has not answered within the timeout."""
+        if encryption_service.key_pending:
+            self._on_key_ready(False)
+    
+    @Slot(bool)
+    def _on_key_ready(self, loaded: bool):
+        """Reopen visible sticky windows and reschedule reminders."""
+        if not loaded:
+            QMessageBox.warning(
+                self,
+                "Aurora Notes",
+                "Could not load the encryption key from the system keychain. "
+                "Notes cannot be opened or saved until it is available; "
+                "restart Aurora Notes to try again."
+            )
+            return
+        
+        # Only stickies that were visible need bodies, fetched in one batch
+        for note, body in self.note_service.get_notes(self._visible_note_ids):
+            self._create_sticky_window(note, body, show=True)
+        
+        self.reminder_service.reschedule_all_reminders(self.note_service)
     
     def _create_sticky_window(self, note, body: str, show: bool = True) -> DesktopStickyNote:
         """Create desktop sticky window for note."""
@@ -328,10 +383,12 @@ class MainWindow(QMainWindow):
     def _on_note_changed(self, sticky: DesktopStickyNote):
         """Handle note content change."""
         note = sticky.note
-        self.note_service.update_note(
+        # Persisted on the autosave writer thread, coalesced with later edits
+        self.autosave_service.enqueue(
             note.id,
             title=sticky.get_title(),
-            body=sticky.get_content()
+            body=sticky.get_content(),
+            pinned=note.pinned
         )
         
         # Update list
@@ -341,85 +398,175 @@ class MainWindow(QMainWindow):
                 item.setText(sticky.get_title())
                 break
     
+    @Slot(list, str)
+    def _on_save_failed(self, note_ids: List[UUID], error: str):
+        """Warn that queued edits could not be saved yet; they are retried."""
+        if self.tray_icon:
+            self.tray_icon.showMessage(
+                "Aurora Notes",
+                f"Could not save {len(note_ids)} note(s), retrying: {error}",
+                QSystemTrayIcon.Warning,
+                5000
+            )
+    
     def _on_sticky_closed(self, note_id: UUID):
         """Handle sticky window closed."""
         self.settings.setValue(f"note_visible_{note_id}", False)
     
     def _delete_note(self, note_id: UUID):
         """Delete note."""
+        self._delete_notes([note_id])
+    
+    def _delete_notes(self, note_ids: List[UUID]):
+        """Delete one or more notes in a single transaction."""
+        if len(note_ids) == 1:
+            message = "Are you sure you want to delete this note?"
+        else:
+            message = f"Are you sure you want to delete {len(note_ids)} notes?"
         reply = QMessageBox.question(
             self,
             "Delete Note",
-            "Are you sure you want to delete this note?",
+            message,
             QMessageBox.Yes | QMessageBox.No
         )
         
         if reply == QMessageBox.Yes:
-            if self.note_service.delete_note(note_id):
+            for note_id in note_ids:
+                self.autosave_service.discard(note_id)
+            if self.note_service.delete_notes(note_ids):
+                deleted = set(note_ids)
+                
                 # Remove from list
-                for i in range(self.note_list.count()):
+                for i in reversed(range(self.note_list.count())):
                     item = self.note_list.item(i)
-                    if item.data(Qt.UserRole) == note_id:
+                    if item.data(Qt.UserRole) in deleted:
                         self.note_list.takeItem(i)
-                        break
                 
-                # Close sticky if open
-                sticky = self.sticky_windows.pop(note_id, None)
-                if sticky:
-                    sticky.close()
-                
-                # Clear saved settings
-                self.settings.remove(f"note_pos_{note_id}")
-                self.settings.remove(f"note_size_{note_id}")
-                self.settings.remove(f"note_visible_{note_id}")
+                for note_id in note_ids:
+                    # Close sticky if open
+                    sticky = self.sticky_windows.pop(note_id, None)
+                    if sticky:
+                        sticky.close()
+                    
+                    # Clear saved settings
+                    self.settings.remove(f"note_pos_{note_id}")
+                    self.settings.remove(f"note_size_{note_id}")
+                    self.settings.remove(f"note_visible_{note_id}")
 
     @Slot()
     def _delete_selected_note(self):
-        """Delete currently selected note."""
-        item = self.note_list.currentItem()
-        if item:
-            note_id = item.data(Qt.UserRole)
-            self._delete_note(note_id)
+        """Delete currently selected notes."""
+        note_ids = [item.data(Qt.UserRole) for item in self.note_list.selectedItems()]
+        if note_ids:
+            self._delete_notes(note_ids)
 
     def _show_note_context_menu(self, pos):
         """Show context menu on right-click."""
         item = self.note_list.itemAt(pos)
-        if not item:
+        if not item or item.data(Qt.UserRole) is None:
             return
         menu = QMenu(self)
         delete_action = QAction("Delete", self)
-        delete_action.triggered.connect(lambda: self._delete_note(item.data(Qt.UserRole)))
+        if item.isSelected():
+            delete_action.triggered.connect(self._delete_selected_note)
+        else:
+            delete_action.triggered.connect(lambda: self._delete_note(item.data(Qt.UserRole)))
         menu.addAction(delete_action)
+        
+        # Bulk pin/unpin of the selection
+        note_ids = [i.data(Qt.UserRole) for i in self.note_list.selectedItems()] or [
+            item.data(Qt.UserRole)
+        ]
+        pin_action = QAction("Pin", self)
+        pin_action.triggered.connect(lambda: self._set_notes_pinned(note_ids, True))
+        menu.addAction(pin_action)
+        unpin_action = QAction("Unpin", self)
+        unpin_action.triggered.connect(lambda: self._set_notes_pinned(note_ids, False))
+        menu.addAction(unpin_action)
         menu.exec(self.note_list.mapToGlobal(pos))
     
+    def _set_notes_pinned(self, note_ids: List[UUID], pinned: bool):
+        """Pin or unpin notes in one transaction and refresh the list."""
+        self.note_service.set_notes_pinned(note_ids, pinned)
+        
+        # Open stickies send their pinned state with every edit; bring them
+        # and any edit already queued in line so it cannot undo this
+        for note_id in note_ids:
+            sticky = self.sticky_windows.get(note_id)
+            if sticky:
+                sticky.set_pinned(pinned)
+                self.autosave_service.enqueue(note_id, pinned=pinned)
+        
+        self._on_folder_selected(self.folder_dock.current_folder_id)
+    
     @Slot(UUID)
     def _on_folder_selected(self, folder_id: Optional[UUID]):
         """Handle folder selection."""
-        # Refresh list
+        # Refresh list; results of a search still running are dropped
+        self.search_worker.cancel()
+        self._search_query = None
+        self._search_more = False
         self.note_list.clear()
-        notes = self.note_service.get_all_notes(folder_id)
+        headers = self.note_service.list_note_headers(folder_id)
         
-        for note, _ in notes:
-            item = QListWidgetItem(note.title)
-            item.setData(Qt.UserRole, note.id)
+        for header in headers:
+            item = QListWidgetItem(header.title)
+            item.setData(Qt.UserRole, header.id)
             self.note_list.addItem(item)
     
     @Slot(str)
     def _perform_search(self, query: str):
-        """Perform fuzzy search."""
+        """Perform fuzzy search on the search worker."""
         if not query:
             # Show all notes
             self._on_folder_selected(self.folder_dock.current_folder_id)
             return
         
-        # Search and update list
+        # Results stream in through _on_search_results, a page at a time
         self.note_list.clear()
-        results = self.note_service.search_notes(query)
-        
-        for note, _, score in results:
-            item = QListWidgetItem(f"{note.title} ({score:.0f}%)")
-            item.setData(Qt.UserRole, note.id)
+        self._search_query = query
+        self._search_shown = 0
+        self._search_more = False
+        self.search_worker.search(query)
+    
+    @Slot(int, list, bool)
+    def _on_search_results(self, generation: int, results: list, final: bool):
+        """Append a ranked batch of search results to the list."""
+        if generation != self.search_worker.generation:
+            return  # Superseded by a newer query
+        
+        for header, text, score in results:
+            item = QListWidgetItem(f"{header.title} ({score:.0f}%)")
+            item.setData(Qt.UserRole, header.id)
+            item.setToolTip(text[:200])
             self.note_list.addItem(item)
+        self._search_shown += len(results)
+    
+    @Slot(int)
+    def _on_more_search_results(self, generation: int):
+        """Remember that the current search has another page of results."""
+        if generation == self.search_worker.generation:
+            self._search_more = True
+            self._on_note_list_scrolled(self.note_list.verticalScrollBar().value())
+    
+    @Slot(int)
+    def _on_note_list_scrolled(self, value: int):
+        """Fetch the next page of search results once the list end is reached."""
+        if self._search_more and value >= self.note_list.verticalScrollBar().maximum():
+            self._search_more = False
+            self.search_worker.search(self._search_query, offset=self._search_shown)
+    
+    @Slot(int, str)
+    def _on_search_failed(self, generation: int, error: str):
+        """Replace partial results of a failed search with the error."""
+        if generation != self.search_worker.generation:
+            return
+        
+        self._search_more = False
+        self.note_list.clear()
+        item = QListWidgetItem(f"Search failed: {error}")
+        item.setFlags(Qt.NoItemFlags)
+        self.note_list.addItem(item)
     
     def _apply_theme(self, theme_name: str):
         """Apply theme to all windows."""
@@ -484,6 +631,13 @@ class MainWindow(QMainWindow):
             self.settings.setValue(f"note_visible_{note_id}", sticky.isVisible())
         
         # Cleanup services
+        self.autosave_service.stop()
+        self.search_worker.stop()
+        try:
+            # Lets the next launch skip rebuilding the search index
+            self.note_service.save_search_index()
+        except Exception as e:
+            print(f"Saving search index failed: {e}")
         self.reminder_service.shutdown()
         self.hotkey_service.stop_listening()
         
@@ -18,6 +18,7 @@ from PySide6.QtGui import (
 )
 
 from ..models.base import Note
+from ..utils.html_canonical import expand_html, minify_html
 from ..services.reminder_service import ReminderService
 
 
@@ -45,7 +46,7 @@ class StickyWindow(QWidget):
         
         # Text editor
         self.editor = QTextEdit()
-        self.editor.setHtml(content)
+        self.editor.setHtml(expand_html(content))
         self.editor.textChanged.connect(self._on_text_changed)
         self.editor.setContextMenuPolicy(Qt.CustomContextMenu)
         self.editor.customContextMenuRequested.connect(self._show_context_menu)
@@ -80,7 +81,7 @@ class StickyWindow(QWidget):
     
     def _save_content(self):
         """Emit signal to save content."""
-        current_content = self.editor.toHtml()
+        current_content = self.get_content()
         if current_content != self._last_content:
             self._last_content = current_content
             self.contentChanged.emit()
@@ -239,8 +240,8 @@ class StickyWindow(QWidget):
         cursor.insertList(QTextListFormat.ListDisc)
     
     def get_content(self) -> str:
-        """Get current content as HTML."""
-        return self.editor.toHtml()
+        """Get current content as compact canonical HTML for storage."""
+        return minify_html(self.editor.toHtml())
     
     def setWindowTitle(self, title: str):
         """Update note title."""
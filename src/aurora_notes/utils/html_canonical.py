@@ -0,0 +1,104 @@
+"""Compact canonical form for QTextEdit HTML.
+
+``QTextEdit.toHtml()`` wraps every note in the same DOCTYPE and ``<style>``
+header and repeats near-identical ``style`` attributes on every block. The
+compact form drops the header, stores each distinct style value once in a
+table and refers to it as ``style="@N"``:
+
+    <!--aurora-html:1:H["style 0", "style 1", ...]--><body style="@0">...
+
+where H indexes QT_HEADS. ``expand_html`` rebuilds the original document
+exactly; anything that is not Qt rich text passes through both functions
+unchanged.
+"""
+
+import json
+import re
+
+MARKER = "<!--aurora-html:1:"
+MARKER_END = "-->"
+TRAILER = "</body></html>"
+
+# Document headers emitted by toHtml(), up to and including </head>
+QT_HEADS = (
+    '<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.0//EN" '
+    '"http://www.w3.org/TR/REC-html40/strict.dtd">\n'
+    '<html><head><meta name="qrichtext" content="1" /><meta charset="utf-8" />'
+    '<style type="text/css">\n'
+    'p, li { white-space: pre-wrap; }\n'
+    'hr { height: 1px; border-width: 0; }\n'
+    'li.unchecked::marker { content: "\\2610"; }\n'
+    'li.checked::marker { content: "\\2612"; }\n'
+    '</style></head>',
+    '<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.0//EN" '
+    '"http://www.w3.org/TR/REC-html40/strict.dtd">\n'
+    '<html><head><meta name="qrichtext" content="1" /><meta charset="utf-8" />'
+    '<style type="text/css">\n'
+    'p, li { white-space: pre-wrap; }\n'
+    'hr { height: 1px; border-width: 0; }\n'
+    '</style></head>',
+)
+
+_STYLE_RE = re.compile(r' style="([^"]*)"')
+_STYLE_REF_RE = re.compile(r' style="@(\d+)"')
+_ADJACENT_SPANS_RE = re.compile(
+    r'<span style="([^"]*)">([^<]*)</span><span style="\1">'
+)
+_EMPTY_SPAN_RE = re.compile(r'<span style="[^"]*"></span>')
+
+
+def minify_html(html: str) -> str:
+    """Convert toHtml() output to the compact canonical form.
+
+    Idempotent: compact input (or any non-Qt HTML) is returned unchanged.
+    """
+    for head_index, head in enumerate(QT_HEADS):
+        if html.startswith(head):
+            break
+    else:
+        return html
+    if not html.endswith(TRAILER):
+        return html
+
+    body = html[len(head):-len(TRAILER)]
+    body = _merge_spans(body)
+
+    styles: list[str] = []
+    index: dict[str, int] = {}
+    for value in _STYLE_RE.findall(body):
+        # Values that could be confused with a reference or close the marker
+        if value.startswith("@") or MARKER_END in value:
+            return html
+        if value not in index:
+            index[value] = len(styles)
+            styles.append(value)
+
+    body = _STYLE_RE.sub(lambda m: f' style="@{index[m.group(1)]}"', body)
+    table = json.dumps(styles, ensure_ascii=False, separators=(",", ":"))
+    return f"{MARKER}{head_index}:{table}{MARKER_END}{body}"
+
+
+def expand_html(content: str) -> str:
+    """Rebuild the full Qt HTML document from the compact form.
+
+    Content that is not in compact form is returned unchanged.
+    """
+    if not content.startswith(MARKER):
+        return content
+
+    head_index, _, rest = content[len(MARKER):].partition(":")
+    table, _, body = rest.partition(MARKER_END)
+    styles = json.loads(table)
+
+    body = _STYLE_REF_RE.sub(lambda m: f' style="{styles[int(m.group(1))]}"', body)
+    return f"{QT_HEADS[int(head_index)]}{body}{TRAILER}"
+
+
+def _merge_spans(body: str) -> str:
+    """Drop empty spans and join adjacent spans that share a style."""
+    body = _EMPTY_SPAN_RE.sub("", body)
+    merged = _ADJACENT_SPANS_RE.sub(r'<span style="\1">\2', body)
+    while merged != body:
+        body = merged
+        merged = _ADJACENT_SPANS_RE.sub(r'<span style="\1">\2', body)
+    return body
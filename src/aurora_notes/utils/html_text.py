@@ -0,0 +1,37 @@
+"""Plain-text extraction from note bodies.
+
+Search and previews only care about the words in a note, not the Qt rich
+text markup around them, which is usually most of the stored bytes.
+``html_to_text`` keeps the visible text with one line per block; bodies
+that are not HTML pass through unchanged.
+"""
+
+import html
+import re
+
+from .html_canonical import MARKER, MARKER_END
+
+_INVISIBLE_RE = re.compile(
+    r"<head\b.*?</head>|<style\b.*?</style>|<script\b.*?</script>|<!--.*?-->",
+    re.IGNORECASE | re.DOTALL
+)
+_BREAK_RE = re.compile(
+    r"<br\b[^>]*>|</(?:p|div|li|h[1-6]|tr|pre|blockquote)>",
+    re.IGNORECASE
+)
+_TAG_RE = re.compile(r"<[^>]*>")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+def html_to_text(content: str) -> str:
+    """Return the visible text of an HTML (or compact) note body."""
+    if content.startswith(MARKER):
+        content = content[content.find(MARKER_END) + len(MARKER_END):]
+    elif not content.lstrip().startswith("<"):
+        return content
+
+    text = _INVISIBLE_RE.sub("", content)
+    text = _BREAK_RE.sub("\n", text)
+    text = _TAG_RE.sub("", text)
+    text = html.unescape(text).replace("\xa0", " ")
+    return _BLANK_LINES_RE.sub("\n", text).strip()
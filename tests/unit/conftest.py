@@ -0,0 +1,32 @@
+"""Shared fixtures: a temporary database and a test encryption key."""
+
+import pytest
+from src.aurora_notes.crypto.encryption import encryption_service
+from src.aurora_notes.models import base
+from src.aurora_notes.models.base import dispose_engines, init_db
+from src.aurora_notes.services.key_store import DataKeyStore
+from src.aurora_notes.services.note_service import NoteService
+
+
+@pytest.fixture(autouse=True)
+def db_path(tmp_path, monkeypatch):
+    """Database path in a temporary directory.
+
+    The default path points there too, so no test can touch the user's notes.
+    """
+    path = str(tmp_path / "notes.db")
+    monkeypatch.setattr(base, "get_db_path", lambda: path)
+    yield path
+    dispose_engines()
+
+
+@pytest.fixture
+def note_service(db_path):
+    """Note service over a fresh database, encrypting with a test key."""
+    saved = encryption_service._key, encryption_service._key_store
+    encryption_service.attach_key_store(DataKeyStore(init_db(reset=True, db_path=db_path)))
+    encryption_service._key = b'test' * 8
+    yield NoteService(db_path)
+    encryption_service.body_cache.clear()
+    encryption_service._key = saved[0]
+    encryption_service.attach_key_store(saved[1])
@@ -0,0 +1,64 @@
+"""Test the benchmark corpus generator and runner."""
+
+import json
+from benchmarks.compare import compare, main as compare_main
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.run import run
+from src.aurora_notes.crypto.encryption import encryption_service
+from src.aurora_notes.models.base import get_engine
+from src.aurora_notes.utils.html_canonical import expand_html
+from src.aurora_notes.utils.html_text import html_to_text
+
+
+class TestCorpus:
+    """Test synthetic note generation."""
+
+    def test_deterministic(self):
+        """Test the same seed yields the same notes and others differ."""
+        notes = list(CorpusGenerator(seed=1).notes(20))
+
+        assert list(CorpusGenerator(seed=1).notes(20)) == notes
+        assert list(CorpusGenerator(seed=2).notes(20)) != notes
+
+    def test_notes_look_like_editor_output(self):
+        """Test bodies are compact Qt rich text with visible words."""
+        [note] = CorpusGenerator().notes(1, folder_ids=["work"])
+
+        assert note["folder_id"] == "work"
+        assert expand_html(note["body"]).startswith("<!DOCTYPE HTML")
+        assert len(html_to_text(note["body"]).split()) > 1
+
+
+class TestRunner:
+    """Test scenario runs and comparison."""
+
+    def test_run_writes_results(self, note_service):
+        """Test a small run covers the requested scenarios as JSON."""
+        key, key_store = encryption_service._key, encryption_service._key_store
+        engine = get_engine()
+        document = run(sizes=[30], scenarios=["search"], repeat=1)
+
+        # The runner's key, key store and engines do not outlive it
+        assert encryption_service._key == key
+        assert encryption_service._key_store is key_store
+        assert get_engine() is engine
+
+        results = json.loads(json.dumps(document))["results"]
+        assert results[0]["scenario"] == "bulk_insert"
+        assert {result["scenario"] for result in results} == {"bulk_insert", "search"}
+        assert all(result["notes"] == 30 and result["best"] >= 0 for result in results)
+        assert document["meta"]["sizes"] == [30]
+
+    def test_compare_flags_regressions(self, tmp_path):
+        """Test slowdowns beyond the threshold are reported."""
+        key = ("search", "meeting", 1000)
+        baseline = {key: {"best": 1.0}}
+
+        assert compare(baseline, {key: {"best": 1.1}}, 0.2) == [(key, 1.0, 1.1, False)]
+        assert compare(baseline, {key: {"best": 1.5}}, 0.2)[0][3]
+
+        for name, best in (("before.json", 1.0), ("after.json", 2.0)):
+            (tmp_path / name).write_text(json.dumps({"results": [
+                {"scenario": "search", "case": "meeting", "notes": 1000, "best": best}
+            ]}))
+        assert compare_main([str(tmp_path / "before.json"), str(tmp_path / "after.json")]) == 1
@@ -1,9 +1,24 @@
 """Test encryption functionality."""
 
+import base64
+import os
+import threading
 import pytest
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from src.aurora_notes.crypto import aead, encryption
+from src.aurora_notes.crypto.benchmark import run_benchmarks
+from src.aurora_notes.crypto.body_cache import BodyCache
 from src.aurora_notes.crypto.encryption import EncryptionService
 
 
+def legacy_encrypt(key: bytes, plaintext: str) -> bytes:
+    """Encrypt in the original headerless nonce + ciphertext + tag format."""
+    nonce = os.urandom(12)
+    encryptor = Cipher(algorithms.AES(key), modes.GCM(nonce)).encryptor()
+    ciphertext = encryptor.update(plaintext.encode()) + encryptor.finalize()
+    return nonce + ciphertext + encryptor.tag
+
+
 class TestEncryption:
     """Test encryption service."""
     
@@ -46,4 +61,371 @@ class TestEncryption:
         
         # But both should decrypt to same plaintext
         assert service.decrypt(enc1) == plaintext
-        assert service.decrypt(enc2) == plaintext
\ No newline at end of file
+        assert service.decrypt(enc2) == plaintext
+    
+    def test_decrypt_legacy_format(self):
+        """Test headerless ciphertexts still decrypt."""
+        service = EncryptionService()
+        service._key = b'd' * 32
+        
+        for _ in range(50):
+            assert service.decrypt(legacy_encrypt(service._key, "Old note")) == "Old note"
+        
+        # A legacy nonce that looks like a versioned header
+        blob = legacy_encrypt(service._key, "Lookalike")
+        forged = bytes((encryption.FORMAT_VERSION, encryption.CODEC_ZLIB)) + blob[2:]
+        nonce = forged[:12]
+        encryptor = Cipher(algorithms.AES(service._key), modes.GCM(nonce)).encryptor()
+        ciphertext = encryptor.update(b"Lookalike") + encryptor.finalize()
+        assert service.decrypt(nonce + ciphertext + encryptor.tag) == "Lookalike"
+    
+    @pytest.mark.parametrize("zstandard", [None, encryption.zstandard])
+    def test_compression(self, monkeypatch, zstandard):
+        """Test large payloads are compressed and small ones are not."""
+        monkeypatch.setattr(encryption, "zstandard", zstandard)
+        service = EncryptionService()
+        service._key = b'e' * 32
+        
+        html = '<p style="margin-top:0px; margin-bottom:0px;">line</p>\n' * 200
+        encrypted = service.encrypt(html)
+        assert encrypted[1] != encryption.CODEC_NONE
+        assert len(encrypted) < len(html) // 4
+        assert service.decrypt(encrypted) == html
+        
+        small = service.encrypt("short")
+        assert small[1] == encryption.CODEC_NONE
+        assert service.decrypt(small) == "short"
+    
+    def test_digest_keyed(self):
+        """Test content digests depend on the key and the content."""
+        service = EncryptionService()
+        service._key = b'f' * 32
+        other = EncryptionService()
+        other._key = b'g' * 32
+        
+        assert service.digest("body") == service.digest("body")
+        assert service.digest("body") != service.digest("body!")
+        assert service.digest("body") != other.digest("body")
+    
+    def test_encrypt_decrypt_many(self):
+        """Test batch API preserves order and accepts memoryviews."""
+        service = EncryptionService()
+        service._key = b'h' * 32
+        
+        plaintexts = [f"Note {i} " * (i * 40) for i in range(10)]
+        encrypted = service.encrypt_many(plaintexts)
+        
+        assert service.decrypt_many(encrypted) == plaintexts
+        assert service.decrypt_many(memoryview(blob) for blob in encrypted) == plaintexts
+        assert service.decrypt(encrypted[3]) == plaintexts[3]
+        
+        # Legacy blobs mixed into the same batch
+        legacy = legacy_encrypt(service._key, "legacy")
+        assert service.decrypt_many([legacy, encrypted[0]]) == ["legacy", plaintexts[0]]
+    
+    def test_aead_reused_until_key_changes(self):
+        """Test the AEAD object is cached per key and dropped on clear."""
+        service = EncryptionService()
+        service._key = b'i' * 32
+        service.encrypt("one")
+        aead = service._aead
+        
+        service.decrypt_many([service.encrypt("two")])
+        assert service._aead is aead
+        
+        service._key = b'j' * 32
+        service.encrypt("three")
+        assert service._aead is not aead
+        
+        service.clear_key()
+        assert service._aead is None
+        with pytest.raises(RuntimeError):
+            service.encrypt("four")
+    
+    def test_parallel_batches_preserve_order(self):
+        """Test chunked thread-pool batches match serial results."""
+        service = EncryptionService()
+        service._key = b'k' * 32
+        service.workers = 4
+        service.chunk_size = 3
+        service.parallel_min_items = 8
+        
+        plaintexts = [f"<p>{i}</p>" * (i % 7 * 100) for i in range(50)]
+        encrypted = service.encrypt_many(plaintexts)
+        
+        assert service._executor is not None
+        assert service.decrypt_many(encrypted) == plaintexts
+        
+        service.workers = 1
+        assert service.decrypt_many(encrypted) == plaintexts
+        
+        service.clear_key()
+        assert service._executor is None
+    
+    def test_decrypt_cached(self, monkeypatch):
+        """Test cached decryption skips AES until the ciphertext changes."""
+        service = EncryptionService()
+        service._key = b'l' * 32
+        first = service.encrypt("first")
+        second = service.encrypt("second")
+        
+        assert service.decrypt_cached("note", first) == "first"
+        monkeypatch.setattr(service, "decrypt", None)
+        assert service.decrypt_cached("note", first) == "first"
+        monkeypatch.undo()
+        
+        # New ciphertext for the same note is a miss
+        assert service.decrypt_cached("note", second) == "second"
+        assert service.decrypt_many_cached(["note", "other"], [second, first]) == [
+            "second", "first"
+        ]
+        
+        service.clear_key()
+        assert len(service.body_cache) == 0
+    
+    def test_initialize_async_gates_first_use(self, monkeypatch):
+        """Test encryption waits for a background keychain fetch."""
+        release = threading.Event()
+        
+        def slow_get_password(service_name, key_name):
+            release.wait(5)
+            return base64.b64encode(b'm' * 32).decode()
+        
+        monkeypatch.setattr(encryption.keyring, "get_password", slow_get_password)
+        service = EncryptionService()
+        future = service.initialize_async()
+        
+        assert not future.done()
+        threading.Timer(0.05, release.set).start()
+        
+        encrypted = service.encrypt("after unlock")
+        assert future.result() is True
+        assert service._key == b'm' * 32
+        assert service.decrypt(encrypted) == "after unlock"
+        assert service.key_fetch_ms is not None
+    
+    def test_initialize_async_failure(self, monkeypatch):
+        """Test a failed background fetch surfaces on first use."""
+        def broken_get_password(service_name, key_name):
+            raise OSError("no secret service")
+        
+        monkeypatch.setattr(encryption.keyring, "get_password", broken_get_password)
+        service = EncryptionService()
+        
+        assert service.initialize_async().result() is False
+        with pytest.raises(RuntimeError):
+            service.encrypt("locked")
+    
+    def test_key_wait_times_out(self, monkeypatch):
+        """Test a keychain fetch that never finishes fails as RuntimeError."""
+        release = threading.Event()
+        
+        def hung_get_password(service_name, key_name):
+            release.wait(5)
+            raise OSError("locked keychain")
+        
+        monkeypatch.setattr(encryption.keyring, "get_password", hung_get_password)
+        service = EncryptionService()
+        service.KEYCHAIN_TIMEOUT = 0.01
+        service.initialize_async()
+        
+        with pytest.raises(RuntimeError, match="Timed out"):
+            service.encrypt("locked")
+        release.set()
+    
+    def test_when_ready(self, monkeypatch):
+        """Test callbacks run once the background fetch ends, or at once."""
+        release = threading.Event()
+        
+        def slow_get_password(service_name, key_name):
+            release.wait(5)
+            return base64.b64encode(b's' * 32).decode()
+        
+        monkeypatch.setattr(encryption.keyring, "get_password", slow_get_password)
+        service = EncryptionService()
+        service.initialize_async()
+        called = threading.Event()
+        calls = []
+        
+        def callback(loaded):
+            calls.append(loaded)
+            called.set()
+        
+        service.when_ready(callback)
+        assert calls == []
+        assert service.key_pending
+        release.set()
+        assert called.wait(5)
+        assert calls == [True]
+        assert not service.key_pending
+        
+        service.when_ready(calls.append)
+        assert calls == [True, True]
+    
+    @pytest.mark.parametrize("zstandard", [None, encryption.zstandard])
+    def test_chunked_round_trip(self, monkeypatch, zstandard):
+        """Test large payloads are split into authenticated segments."""
+        monkeypatch.setattr(encryption, "zstandard", zstandard)
+        service = EncryptionService()
+        service._key = b'n' * 32
+        service.SEGMENT_SIZE = 64
+        
+        text = "".join(f"{i} naïve café € " for i in range(200))
+        encrypted = service.encrypt(text)
+        
+        assert encrypted[0] == encryption.CHUNKED_VERSION
+        assert service.decrypt(encrypted) == text
+        assert len(list(service.iter_decrypt(encrypted))) > 1
+        assert "".join(service.iter_decrypt(encrypted)) == text
+        assert service.decrypt_prefix(encrypted, 25) == text[:25]
+        assert service.decrypt_many([encrypted]) == [text]
+        
+        # Short notes keep the single-shot format
+        assert service.decrypt_prefix(service.encrypt("short"), 3) == "sho"
+    
+    def test_chunked_prefix_is_partial(self):
+        """Test a preview only authenticates the segments it reads."""
+        service = EncryptionService()
+        service._key = b'o' * 32
+        service.SEGMENT_SIZE = 1024
+        
+        text = os.urandom(4096).hex()  # Barely compressible
+        encrypted = bytearray(service.encrypt(text))
+        encrypted[-1] ^= 1  # Corrupt the final segment
+        
+        assert service.decrypt_prefix(bytes(encrypted), 50) == text[:50]
+        with pytest.raises(encryption.InvalidTag):
+            service.decrypt(bytes(encrypted))
+    
+    def test_chunked_truncation_detected(self):
+        """Test dropping trailing segments fails authentication."""
+        service = EncryptionService()
+        service._key = b'p' * 32
+        service.SEGMENT_SIZE = 1024
+        
+        encrypted = service.encrypt(os.urandom(4096).hex())
+        truncated = encrypted[:encryption.CHUNK_HEADER_SIZE + 2 * (1024 + 16)]
+        
+        with pytest.raises(encryption.InvalidTag):
+            service.decrypt(truncated)
+    
+    def test_chunked_blobs_use_own_subkeys(self):
+        """Test every chunked blob is sealed under a subkey from its own salt."""
+        service = EncryptionService()
+        service._key = b'r' * 32
+        service.SEGMENT_SIZE = 1024
+        
+        text = os.urandom(4096).hex()
+        first, second = service.encrypt(text), service.encrypt(text)
+        salts = [blob[10:encryption.CHUNK_HEADER_SIZE] for blob in (first, second)]
+        assert len(salts[0]) == encryption.CHUNK_SALT_SIZE
+        assert salts[0] != salts[1]
+        
+        # Same segment nonce, but the master key alone no longer opens it
+        nonce = bytes(11) + b"\x00"
+        segment = first[encryption.CHUNK_HEADER_SIZE:encryption.CHUNK_HEADER_SIZE + 1024 + 16]
+        with pytest.raises(encryption.InvalidTag):
+            encryption.AESGCM(service._key).decrypt(nonce, segment, first[:encryption.CHUNK_HEADER_SIZE])
+        assert service.decrypt_many([first, second]) == [text, text]
+    
+    def test_legacy_chunked_still_decrypts(self):
+        """Test version 3 blobs with a nonce prefix under the key stay readable."""
+        service = EncryptionService()
+        service._key = b's' * 32
+        
+        payload = os.urandom(100).hex().encode()
+        header = (
+            bytes((encryption.LEGACY_CHUNKED_VERSION, 0))
+            + bytes(4)
+            + (64).to_bytes(4, "big")
+            + os.urandom(7)
+        )
+        segments = [payload[start:start + 64] for start in range(0, len(payload), 64)]
+        blob = header + b"".join(
+            encryption.AESGCM(service._key).encrypt(
+                header[10:] + index.to_bytes(4, "big") + bytes((index == len(segments) - 1,)),
+                segment,
+                header
+            )
+            for index, segment in enumerate(segments)
+        )
+        
+        assert service.decrypt(blob) == payload.decode()
+        assert "".join(service.iter_decrypt(blob)) == payload.decode()
+    
+    def test_chacha20_poly1305(self):
+        """Test ciphertexts record their AEAD and decrypt whichever is current."""
+        service = EncryptionService()
+        service._key = b'q' * 32
+        service.SEGMENT_SIZE = 1024
+        
+        service.algorithm = aead.ALG_CHACHA20_POLY1305
+        plaintexts = ["short", "<p>repeated</p>" * 100, os.urandom(4096).hex()]
+        chacha = service.encrypt_many(plaintexts)
+        assert [blob[1] >> 4 for blob in chacha] == [aead.ALG_CHACHA20_POLY1305] * 3
+        assert chacha[2][0] == encryption.CHUNKED_VERSION
+        
+        service.algorithm = aead.ALG_AES_GCM
+        aes = service.encrypt("short")
+        assert aes[1] >> 4 == aead.ALG_AES_GCM
+        assert service.decrypt_many(chacha + [aes]) == plaintexts + ["short"]
+        assert service.decrypt_prefix(chacha[2], 10) == plaintexts[2][:10]
+    
+    def test_select_fastest_algorithm(self, monkeypatch):
+        """Test the benchmark policy picks the algorithm for new writes."""
+        service = EncryptionService()
+        service._key = b'r' * 32
+        
+        assert service.select_fastest_algorithm() in aead.AEAD_CLASSES
+        
+        monkeypatch.setattr(
+            encryption, "fastest_algorithm", lambda: aead.ALG_CHACHA20_POLY1305
+        )
+        service.select_fastest_algorithm()
+        assert service.encrypt("new")[1] >> 4 == aead.ALG_CHACHA20_POLY1305
+    
+    def test_benchmark_reports_throughput(self):
+        """Test the micro-benchmark covers every algorithm and operation."""
+        results = run_benchmarks(sizes=(1024,), rounds=1)
+        
+        assert {name for name, _, _ in results} == set(aead.ALGORITHM_NAMES.values())
+        assert {operation for _, operation, _ in results} == {"encrypt", "decrypt"}
+        assert all(mb_per_s > 0 for mb_per_s in results.values())
+
+
+class TestBodyCache:
+    """Test decrypted body cache."""
+    
+    def test_lru_eviction_by_bytes(self):
+        """Test least recently used entries are evicted over budget."""
+        body = "x" * 1000
+        cache = BodyCache(max_bytes=3500)
+        
+        for note_id in ("a", "b", "c"):
+            cache.put(note_id, b"v1", body)
+        cache.get("a", b"v1")
+        cache.put("d", b"v1", body)
+        
+        assert cache.get("b", b"v1") is None
+        assert cache.get("a", b"v1") == body
+        assert cache.size_bytes <= cache.max_bytes
+    
+    def test_version_and_invalidate(self):
+        """Test stale versions miss and invalidation drops entries."""
+        cache = BodyCache()
+        cache.put("a", b"v1", "old")
+        
+        assert cache.get("a", b"v2") is None
+        assert len(cache) == 0
+        
+        cache.put("a", b"v2", "new")
+        cache.invalidate("a")
+        assert cache.get("a", b"v2") is None
+        assert cache.size_bytes == 0
+    
+    def test_oversized_body_not_cached(self):
+        """Test bodies larger than the budget are not kept."""
+        cache = BodyCache(max_bytes=100)
+        cache.put("a", b"v1", "x" * 1000)
+        
+        assert len(cache) == 0
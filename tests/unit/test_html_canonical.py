@@ -0,0 +1,65 @@
+"""Test canonical HTML minification."""
+
+import pytest
+from PySide6.QtGui import QTextDocument
+from src.aurora_notes.utils.html_canonical import expand_html, minify_html
+
+SAMPLES = [
+    "",
+    "<p>Hello <b>bold</b> and <i>italic</i> world</p>",
+    "<ul><li>one</li><li>two</li></ul><p></p><p>after list</p>",
+    '<p><span style="background:yellow">hi</span> there</p>'
+    '<p style="font-family:Courier; font-size:18pt">Big "quoted" text &amp; more</p>',
+    "<p>Ünïcödé ✓ 中文</p>",
+]
+
+
+def to_html(html: str) -> str:
+    """Round-trip HTML through a QTextDocument."""
+    document = QTextDocument()
+    document.setHtml(html)
+    return document.toHtml()
+
+
+@pytest.mark.parametrize("source", SAMPLES)
+class TestHtmlCanonical:
+    """Test minify/expand against QTextDocument."""
+    
+    def test_round_trip(self, qapp, source):
+        """Test expanding reconstructs the exact document."""
+        html = to_html(source)
+        compact = minify_html(html)
+        
+        assert compact != html
+        assert len(compact) < len(html)
+        assert expand_html(compact) == html
+        assert to_html(expand_html(compact)) == html
+    
+    def test_idempotent(self, qapp, source):
+        """Test minifying twice changes nothing."""
+        compact = minify_html(to_html(source))
+        
+        assert minify_html(compact) == compact
+        assert minify_html(expand_html(compact)) == compact
+
+
+class TestHtmlPassthrough:
+    """Test non-Qt content is left alone."""
+    
+    def test_plain_content_unchanged(self):
+        """Test legacy and plain bodies pass through both directions."""
+        for content in ("", "Learn Python basics", "<p>Test content</p>"):
+            assert minify_html(content) == content
+            assert expand_html(content) == content
+    
+    def test_adjacent_spans_merged(self, qapp):
+        """Test redundant adjacent spans collapse without changing the document."""
+        html = to_html("<p>x</p>")
+        style = ' style=" font-weight:700;"'
+        spans = f"<span{style}>a</span><span{style}>b</span><span{style}></span>"
+        redundant = html.replace(">x<", f">{spans}<")
+        
+        compact = minify_html(redundant)
+        
+        assert compact.count("<span") == 1
+        assert to_html(expand_html(compact)) == to_html(redundant)
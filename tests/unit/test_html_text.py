@@ -0,0 +1,34 @@
+"""Test plain-text extraction from note bodies."""
+
+import pytest
+from PySide6.QtGui import QTextDocument
+from src.aurora_notes.utils.html_canonical import minify_html
+from src.aurora_notes.utils.html_text import html_to_text
+
+SAMPLES = [
+    "<p>Hello <b>bold</b> and <i>italic</i> world</p>",
+    "<ul><li>one</li><li>two</li></ul><p></p><p>after list</p>",
+    '<p><span style="background:yellow">hi</span> there</p>'
+    '<p style="font-family:Courier; font-size:18pt">Big "quoted" text &amp; more</p>',
+    "<p>line<br />break&nbsp;here &lt;tag&gt;</p>",
+    "<p>Ünïcödé ✓ 中文</p>",
+]
+
+
+@pytest.mark.parametrize("source", SAMPLES)
+def test_matches_qt_plain_text(qapp, source):
+    """Test extraction agrees with QTextDocument for full and compact HTML."""
+    document = QTextDocument()
+    document.setHtml(source)
+    html = document.toHtml()
+    expected = document.toPlainText().strip()
+    
+    assert html_to_text(html) == expected
+    assert html_to_text(minify_html(html)) == expected
+    assert "style" not in html_to_text(html)
+
+
+def test_plain_text_passthrough():
+    """Test bodies that are not HTML are returned unchanged."""
+    assert html_to_text("just text, 1 < 2") == "just text, 1 < 2"
+    assert html_to_text("") == ""
@@ -0,0 +1,160 @@
+"""Test envelope encryption and master key rotation."""
+
+import base64
+import pytest
+from sqlmodel import Session, select
+from src.aurora_notes.crypto import encryption
+from src.aurora_notes.crypto.encryption import (
+    EncryptionService,
+    encryption_service,
+    master_key_id,
+)
+from src.aurora_notes.models.base import DataKey, Note, Settings
+from src.aurora_notes.services.key_rotation import KeyRotationJob
+from src.aurora_notes.services.note_service import NoteService
+
+
+@pytest.fixture
+def keychain(monkeypatch):
+    """In-memory stand-in for the OS keychain."""
+    store = {
+        (EncryptionService.SERVICE_NAME, EncryptionService.KEY_NAME):
+            base64.b64encode(b'test' * 8).decode()
+    }
+    monkeypatch.setattr(
+        encryption.keyring, "get_password",
+        lambda service, name: store.get((service, name))
+    )
+    monkeypatch.setattr(
+        encryption.keyring, "set_password",
+        lambda service, name, value: store.__setitem__((service, name), value)
+    )
+    monkeypatch.setattr(
+        encryption.keyring, "delete_password",
+        lambda service, name: store.pop((service, name))
+    )
+    return store
+
+
+@pytest.fixture
+def note_service(keychain, note_service):
+    """Shared note service, with no rotation pending before or after."""
+    encryption_service._next_key = None
+    yield note_service
+    encryption_service._next_key = None
+
+
+def stored_rows(note_service):
+    """Return notes and data keys as stored in the database."""
+    with Session(note_service.engine) as session:
+        notes = {n.id: (n.body_enc, n.data_key_id) for n in session.exec(select(Note))}
+        keys = {k.id: k.master_key_id for k in session.exec(select(DataKey))}
+    return notes, keys
+
+
+class TestEnvelopeEncryption:
+    """Test bodies sealed with wrapped data keys."""
+    
+    def test_notes_use_data_key(self, note_service):
+        """Test new notes reference a data key wrapped by the master key."""
+        note = note_service.create_note(title="A", body="secret")
+        notes, keys = stored_rows(note_service)
+        
+        body_enc, key_id = notes[note.id]
+        assert body_enc[0] == encryption.ENVELOPE_VERSION
+        assert encryption_service.data_key_id(body_enc) == key_id
+        assert keys[key_id] == master_key_id(encryption_service._key)
+        assert note_service.get_note(note.id)[1] == "secret"
+    
+    def test_reencrypt_legacy_notes(self, note_service):
+        """Test notes sealed with the master key move onto data keys."""
+        note = note_service.create_note(title="A", body="old body")
+        with Session(note_service.engine) as session:
+            stored = session.get(Note, note.id)
+            stored.body_enc = encryption_service._encrypt_one(
+                (None, encryption_service._get_aead()), "old body"
+            )
+            stored.data_key_id = None
+            session.add(stored)
+            session.commit()
+        encryption_service.body_cache.clear()
+        
+        assert note_service.reencrypt_legacy_notes() == 1
+        assert note_service.reencrypt_legacy_notes() == 0
+        
+        notes, _ = stored_rows(note_service)
+        assert notes[note.id][1] is not None
+        assert note_service.get_note(note.id)[1] == "old body"
+
+
+class TestKeyRotation:
+    """Test master key rotation."""
+    
+    def test_rotation_rewraps_only_data_keys(self, note_service, keychain, db_path):
+        """Test rotation leaves note ciphertexts untouched."""
+        created = note_service.create_notes(
+            {"title": f"Note {i}", "body": f"Body {i}"} for i in range(5)
+        )
+        old_key = encryption_service._key
+        notes_before, _ = stored_rows(note_service)
+        
+        counts = KeyRotationJob(note_service).run()
+        
+        notes_after, keys = stored_rows(note_service)
+        new_key_id = master_key_id(encryption_service._key)
+        assert encryption_service._key != old_key
+        assert not encryption_service.rotation_pending
+        assert counts["data_keys"] == len(keys)
+        assert notes_after == notes_before
+        assert set(keys.values()) == {new_key_id}
+        assert (encryption_service.SERVICE_NAME, encryption_service.NEXT_KEY_NAME) not in keychain
+        
+        encryption_service.clear_key()
+        assert encryption_service.initialize()
+        note_service = NoteService(db_path)
+        assert [note_service.get_note(note_id)[1] for note_id in created] == [
+            f"Body {i}" for i in range(5)
+        ]
+    
+    def test_rotation_resumes(self, note_service, keychain):
+        """Test an interrupted rotation completes on the next run."""
+        note = note_service.create_note(title="A", body="resumable")
+        
+        next_key_id = encryption_service.begin_rotation()
+        # Simulate a restart: the pending key is reloaded from the keychain
+        encryption_service._next_key = None
+        assert encryption_service.initialize()
+        assert encryption_service.rotation_pending
+        assert master_key_id(encryption_service._next_key) == next_key_id
+        
+        counts = KeyRotationJob(note_service).run()
+        
+        assert counts["data_keys"] == 1
+        assert master_key_id(encryption_service._key) == next_key_id
+        assert note_service.get_note(note.id)[1] == "resumable"
+    
+    def test_rotation_reencrypts_settings(self, note_service):
+        """Test settings stay readable after rotation."""
+        with Session(note_service.engine) as session:
+            session.add(Settings(key="theme", value_enc=encryption_service.encrypt_json("dark")))
+            session.commit()
+        
+        counts = KeyRotationJob(note_service).run()
+        
+        assert counts["settings"] == 1
+        with Session(note_service.engine) as session:
+            setting = session.get(Settings, "theme")
+            assert encryption_service.decrypt_json(setting.value_enc) == "dark"
+    
+    def test_rotation_keeps_blind_index(self, note_service, monkeypatch, db_path):
+        """Test blind index digests stay valid across rotation."""
+        monkeypatch.setattr(NoteService, "BLIND_INDEX", True)
+        service = NoteService(db_path)
+        note = service.create_note(title="Plan", body="<p>Orchard</p>")
+        key = service.blind_index.key
+        
+        KeyRotationJob(service).run()
+        
+        service = NoteService(db_path)
+        assert service.blind_index.key == key
+        assert [n.id for n, _, _ in service.search_notes("orchard")] == [note.id]
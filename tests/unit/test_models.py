@@ -0,0 +1,74 @@
+"""Test database engine and schema setup."""
+
+from sqlmodel import Session, SQLModel, select
+from src.aurora_notes.models.base import Folder, get_engine
+from src.aurora_notes.models.migrations import (
+    LATEST_VERSION,
+    get_schema_version,
+    migrate,
+)
+
+
+class TestEngineRegistry:
+    """Test shared engine registry."""
+
+    def test_engine_shared_per_path(self, db_path, tmp_path):
+        """Test one engine is handed out per database path."""
+        engine = get_engine(db_path)
+
+        assert get_engine(db_path) is engine
+        assert get_engine(str(tmp_path / "other.db")) is not engine
+
+    def test_pragmas_applied(self, db_path):
+        """Test connection PRAGMA profile."""
+        engine = get_engine(db_path)
+
+        with engine.connect() as conn:
+            journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+            busy_timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+
+        assert journal_mode == "wal"
+        assert busy_timeout == 30000
+
+
+class TestMigrations:
+    """Test versioned schema migrations."""
+
+    def test_migrate_fresh_database(self, db_path):
+        """Test migrating an empty database to the latest version."""
+        engine = get_engine(db_path)
+
+        assert migrate(engine) == LATEST_VERSION
+
+        with engine.connect() as conn:
+            assert get_schema_version(conn) == LATEST_VERSION
+            tables = set(conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            ).scalars())
+        assert set(SQLModel.metadata.tables) <= tables
+
+    def test_migrate_preserves_data(self, db_path):
+        """Test re-running migrations keeps existing rows."""
+        engine = get_engine(db_path)
+        migrate(engine)
+
+        with Session(engine) as session:
+            session.add(Folder(name="Work"))
+            session.commit()
+
+        assert migrate(engine) == LATEST_VERSION
+
+        with Session(engine) as session:
+            assert [f.name for f in session.exec(select(Folder))] == ["Work"]
+
+    def test_migrated_schema_matches_models(self, db_path):
+        """Test migrations produce the columns the models expect."""
+        engine = get_engine(db_path)
+        migrate(engine)
+
+        with engine.connect() as conn:
+            for name, table in SQLModel.metadata.tables.items():
+                columns = {
+                    row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{name}")')
+                }
+                assert columns == set(table.columns.keys())
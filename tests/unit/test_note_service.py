@@ -1,27 +1,35 @@
 """Test note service functionality."""
 
-import pytest
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+from uuid import uuid4
+from sqlalchemy import update
+from sqlmodel import Session, select
 from src.aurora_notes.services.note_service import NoteService
 from src.aurora_notes.crypto.encryption import encryption_service
-from src.aurora_notes.models.base import init_db
+from src.aurora_notes.models.base import Note, NoteHeader, NoteToken
 
 
-@pytest.fixture
-def note_service():
-    """Create note service with test database."""
-    # Initialize test database
-    init_db()
-    
-    # Initialize encryption with test key
-    encryption_service._key = b'test' * 8
-    
-    return NoteService()
+def query_plan(engine, statement) -> str:
+    """Return EXPLAIN QUERY PLAN details for a statement."""
+    compiled = statement.compile(dialect=engine.dialect)
+    params = [str(compiled.params[name]) for name in compiled.positiontup]
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {compiled}", tuple(params)
+        ).all()
+    return " | ".join(row[-1] for row in rows)
 
 
 class TestNoteService:
     """Test note CRUD operations."""
     
+    def test_constructor_keeps_key_store(self, note_service, db_path):
+        """Test creating a service leaves the process-wide key store alone."""
+        key_store = encryption_service._key_store
+        NoteService(db_path)
+        assert encryption_service._key_store is key_store
+    
     def test_create_note(self, note_service):
         """Test note creation."""
         note = note_service.create_note(
@@ -50,6 +58,18 @@ class TestNoteService:
         assert retrieved_note.id == note.id
         assert body == "<p>Content</p>"
     
+    def test_get_notes(self, note_service, monkeypatch):
+        """Test batch retrieval keeps input order and skips missing notes."""
+        monkeypatch.setattr(NoteService, "BATCH_SIZE", 2)
+        ids = note_service.create_notes(
+            {"title": f"Note {i}", "body": f"<p>Body {i}</p>"} for i in range(3)
+        )
+        
+        results = note_service.get_notes([ids[2], uuid4(), ids[0], ids[1]])
+        
+        assert [note.id for note, _ in results] == [ids[2], ids[0], ids[1]]
+        assert [body for _, body in results] == ["<p>Body 2</p>", "<p>Body 0</p>", "<p>Body 1</p>"]
+    
     def test_update_note(self, note_service):
         """Test note update."""
         # Create note
@@ -89,4 +109,424 @@ class TestNoteService:
         
         # Check scores are sorted
         scores = [score for _, _, score in results]
-        assert scores == sorted(scores, reverse=True)
\ No newline at end of file
+        assert scores == sorted(scores, reverse=True)
+    
+    def test_search_returns_all_matches(self, note_service):
+        """Test search is uncapped unless a limit is passed."""
+        ids = note_service.create_notes(
+            {"title": "Agenda", "body": f"<p>{i}</p>"} for i in range(150)
+        )
+        
+        results = note_service.search_notes("agenda")
+        assert [note.id for note, _, _ in results] == sorted(ids)
+        assert isinstance(results[0][0], NoteHeader)  # Column-only read-back
+        assert len(note_service.search_notes("agenda", limit=10)) == 10
+    
+    def test_search_ignores_markup(self, note_service):
+        """Test search matches visible text, not HTML styles."""
+        styled = note_service.create_note(
+            "Styled", '<p style="margin-top:12px; font-family:Helvetica">Groceries</p>'
+        )
+        
+        assert note_service.search_notes("helvetica") == []
+        [(note, text, _)] = note_service.search_notes("groceries")
+        assert note.id == styled.id
+        assert text == "Groceries"
+    
+    def test_search_index_maintained(self, note_service, monkeypatch):
+        """Test searches use the index, kept current without decrypting."""
+        note = note_service.create_note("Recipe", "<p>Tomato soup</p>")
+        note_service.search_notes("soup")
+        assert note_service.search_index.ready
+        
+        monkeypatch.setattr(encryption_service, "decrypt_many", None)
+        monkeypatch.setattr(encryption_service, "decrypt_many_cached", None)
+        
+        note_service.update_note(note.id, body="<p>Lentil stew</p>")
+        [created] = note_service.create_notes([{"title": "Soup list", "body": ""}])
+        
+        assert [n.id for n, _, _ in note_service.search_notes("stew")] == [note.id]
+        assert [n.id for n, _, _ in note_service.search_notes("soup")] == [created]
+        
+        note_service.delete_notes([created])
+        assert note_service.search_notes("soup") == []
+    
+    def test_search_index_build_does_not_block_writes(self, note_service, monkeypatch):
+        """Test writes during a build proceed and are indexed once it lands."""
+        note_service.create_note("Before", "<p>Walnut bread</p>")
+        iter_text_pages = note_service._iter_text_pages
+        written = []
+        
+        def write_during_build():
+            yield from iter_text_pages()
+            # After the build has read every note, before it is swapped in
+            worker = threading.Thread(target=lambda: written.append(
+                note_service.create_note("During", "<p>Walnut cake</p>")
+            ))
+            worker.start()
+            worker.join(timeout=5)
+            assert written, "create_note blocked on the index build"
+        
+        monkeypatch.setattr(note_service, "_iter_text_pages", write_during_build)
+        note_service.build_search_index()
+        
+        assert note_service.search_index.ready
+        titles = {n.title for n, _, _ in note_service.search_notes("walnut")}
+        assert titles == {"Before", "During"}
+    
+    def test_search_matches_substrings(self, note_service):
+        """Test mid-word substrings need three characters; two match prefixes only."""
+        note = note_service.create_note("Meeting notes", "<p>agenda</p>")
+        
+        assert [n.id for n, _, _ in note_service.search_notes("ting")] == [note.id]
+        assert [n.id for n, _, _ in note_service.search_notes("me")] == [note.id]
+        assert note_service.search_notes("et") == []
+    
+    def test_change_counter(self, note_service):
+        """Test inserts, deletes and title or text changes bump the counter."""
+        start = note_service._change_seq()
+        note = note_service.create_note("Counted", "<p>One</p>")
+        assert note_service._change_seq() == start + 1
+        
+        note_service.update_note(note.id, pinned=True)
+        assert note_service._change_seq() == start + 1
+        
+        note_service.update_note(note.id, body="<p>Two</p>")
+        with Session(note_service.engine) as session:
+            assert session.get(Note, note.id).change_seq == start + 2
+        
+        note_service.delete_note(note.id)
+        assert note_service._change_seq() == start + 3
+    
+    def test_search_snapshot_warm_start(self, note_service, tmp_path, monkeypatch, db_path):
+        """Test a saved index is restored, re-indexing only changed notes."""
+        snapshot_path = str(tmp_path / "search_index.snap")
+        note_service.search_snapshot_path = snapshot_path
+        kept = note_service.create_note("Kept", "<p>Apple pie</p>")
+        changed = note_service.create_note("Changed", "<p>Banana bread</p>")
+        deleted = note_service.create_note("Deleted", "<p>Cherry tart</p>")
+        note_service.build_search_index()
+        note_service.save_search_index()
+        
+        # Changes made while the snapshot was not being maintained
+        other = NoteService(db_path)
+        other.update_note(changed.id, body="<p>Mango bread</p>")
+        other.delete_note(deleted.id)
+        added = other.create_note("Added", "<p>Cherry cake</p>")
+        
+        restored = NoteService(db_path)
+        restored.search_snapshot_path = snapshot_path
+        decrypted = []
+        decrypt_texts = restored._decrypt_texts
+        
+        def recording_decrypt_texts(notes):
+            decrypted.extend(note.id for note in notes)
+            return decrypt_texts(notes)
+        
+        monkeypatch.setattr(restored, "_decrypt_texts", recording_decrypt_texts)
+        restored.build_search_index()
+        
+        assert sorted(decrypted) == sorted([changed.id, added.id])
+        assert [n.id for n, _, _ in restored.search_notes("apple")] == [kept.id]
+        assert [n.id for n, _, _ in restored.search_notes("mango")] == [changed.id]
+        assert restored.search_notes("banana") == []
+        assert [n.id for n, _, _ in restored.search_notes("cherry")] == [added.id]
+    
+    def test_search_snapshot_rejected(self, note_service, tmp_path, db_path):
+        """Test unreadable or stale-format snapshots fall back to a rebuild."""
+        snapshot_path = tmp_path / "search_index.snap"
+        note_service.search_snapshot_path = str(snapshot_path)
+        note = note_service.create_note("Plums", "<p>Ripe</p>")
+        note_service.build_search_index()
+        note_service.save_search_index()
+        
+        data = bytearray(snapshot_path.read_bytes())
+        data[-1] ^= 1
+        snapshot_path.write_bytes(bytes(data))
+        restored = NoteService(db_path)
+        restored.search_snapshot_path = str(snapshot_path)
+        restored.build_search_index()
+        assert [n.id for n, _, _ in restored.search_notes("ripe")] == [note.id]
+        
+        data[4:6] = (999).to_bytes(2, "big")
+        snapshot_path.write_bytes(bytes(data))
+        restored = NoteService(db_path)
+        restored.search_snapshot_path = str(snapshot_path)
+        restored.build_search_index()
+        assert [n.id for n, _, _ in restored.search_notes("plums")] == [note.id]
+    
+    def test_blind_index_prefilters_search(self, note_service, monkeypatch, db_path):
+        """Test the blind index limits decryption to candidate notes."""
+        monkeypatch.setattr(NoteService, "BLIND_INDEX", True)
+        writer = NoteService(db_path)
+        soup = writer.create_note("Soup", "<p>Tomato soup</p>")
+        [stew, cake] = writer.create_notes([
+            {"title": "Stew", "body": "<p>Lentil stew</p>"},
+            {"title": "Cake", "body": "<p>Carrot cake</p>"},
+        ])
+        
+        reader = NoteService(db_path)
+        decrypted = []
+        decrypt_texts = reader._decrypt_texts
+        
+        def recording_decrypt_texts(notes):
+            decrypted.extend(note.id for note in notes)
+            return decrypt_texts(notes)
+        
+        monkeypatch.setattr(reader, "_decrypt_texts", recording_decrypt_texts)
+        assert [n.id for n, _, _ in reader.search_notes("tomatto")] == [soup.id]
+        assert decrypted == [soup.id]
+        assert not reader.search_index.ready
+        
+        # Writes store fresh digests, so searches never digest notes
+        writer.update_note(stew, body="<p>Tomato stew</p>")
+        writer.update_notes([{"id": cake, "title": "Tomato cake"}])
+        assert reader.blind_index.missing_ids() == []
+        decrypted.clear()
+        assert reader.search_notes("lentil") == []
+        assert decrypted == []
+        assert {n.id for n, _, _ in reader.search_notes("tomato")} == {soup.id, stew, cake}
+        assert not reader.search_index.ready
+        
+        writer.delete_note(soup.id)
+        with Session(writer.engine) as session:
+            rows = session.exec(select(NoteToken).where(NoteToken.note_id == soup.id)).all()
+        assert rows == []
+    
+    def test_blind_index_backfill(self, note_service, monkeypatch, db_path):
+        """Test notes saved before the blind index are digested by the backfill."""
+        notes = note_service.create_notes(
+            {"title": f"Note {i}", "body": f"<p>Quince {i}</p>"} for i in range(3)
+        )
+        monkeypatch.setattr(NoteService, "BLIND_INDEX", True)
+        service = NoteService(db_path)
+        assert len(service.blind_index.missing_ids()) == 3
+        
+        assert service.backfill_blind_index(batch_size=2) == 3
+        assert service.backfill_blind_index() == 0
+        assert {n.id for n, _, _ in service.search_notes("quince")} == set(notes)
+    
+    def test_blind_index_key_stored_once(self, note_service, monkeypatch, db_path):
+        """Test the digest key is created once and then only read back."""
+        monkeypatch.setattr(NoteService, "BLIND_INDEX", True)
+        first = NoteService(db_path)
+        first.create_note("Keyed", "text")
+        key = first.blind_index.key
+        
+        def fail(value):
+            raise AssertionError("key encrypted again")
+        
+        monkeypatch.setattr(encryption_service, "encrypt_json", fail)
+        assert NoteService(db_path).blind_index.key == key
+    
+    def test_plain_text_backfilled(self, note_service):
+        """Test notes saved without plain text get it derived on first use."""
+        note = note_service.create_note("Old", "<p>Legacy <b>body</b></p>")
+        with Session(note_service.engine) as session:
+            session.execute(update(Note).values(text_enc=None))
+            session.commit()
+        
+        [(_, text, _)] = note_service.search_notes("legacy")
+        assert text == "Legacy body"
+        
+        with Session(note_service.engine) as session:
+            text_enc = session.get(Note, note.id).text_enc
+        assert encryption_service.decrypt(text_enc) == "Legacy body"
+        
+        note_service.update_note(note.id, body="<p>Rewritten</p>")
+        [(_, text, _)] = note_service.search_notes("rewritten")
+        assert text == "Rewritten"
+    
+    def test_get_all_notes_pinned_first(self, note_service):
+        """Test listing puts pinned notes first."""
+        note_service.create_note("Plain", "<p>a</p>")
+        pinned = note_service.create_note("Pinned", "<p>b</p>", pinned=True)
+        
+        results = note_service.get_all_notes()
+        
+        assert results[0][0].id == pinned.id
+    
+    def test_get_upcoming_reminders(self, note_service):
+        """Test only future reminders are returned, soonest first."""
+        now = datetime.utcnow()
+        note_service.create_note("Past", "", reminder_at=now - timedelta(hours=1))
+        later = note_service.create_note("Later", "", reminder_at=now + timedelta(days=1))
+        soon = note_service.create_note("Soon", "", reminder_at=now + timedelta(hours=1))
+        note_service.create_note("None", "")
+        
+        results = note_service.get_upcoming_reminders(now)
+        
+        assert [note.id for note, _ in results] == [soon.id, later.id]
+    
+    def test_get_upcoming_reminders_preview(self, note_service):
+        """Test reminder previews return only the start of each body."""
+        body = "x" * 300_000
+        note_service.create_note(
+            "Big", body, reminder_at=datetime.utcnow() + timedelta(hours=1)
+        )
+        
+        [(note, preview)] = note_service.get_upcoming_reminders(preview_chars=51)
+        
+        assert preview == body[:51]
+    
+    def test_listing_uses_indexes(self, note_service):
+        """Test listing and reminder queries are served by indexes."""
+        engine = note_service.engine
+        
+        plan = query_plan(engine, note_service._listing_statement(uuid4()))
+        assert "ix_note_folder_pinned_updated" in plan
+        assert "TEMP B-TREE" not in plan
+        
+        plan = query_plan(engine, note_service._listing_statement())
+        assert "ix_note_pinned_updated" in plan
+        assert "TEMP B-TREE" not in plan
+        
+        plan = query_plan(engine, note_service._reminders_statement())
+        assert "ix_note_reminder_at" in plan
+        assert "TEMP B-TREE" not in plan
+    
+    def test_list_note_headers_skips_decryption(self, note_service, monkeypatch):
+        """Test header listing never touches encrypted bodies."""
+        folder_id = uuid4()
+        note = note_service.create_note("Listed", "<p>Secret</p>", folder_id=folder_id)
+        note_service.create_note("Elsewhere", "<p>Other</p>")
+        
+        def fail_decrypt(encrypted):
+            raise AssertionError("body decrypted during listing")
+        
+        monkeypatch.setattr(encryption_service, "decrypt", fail_decrypt)
+        headers = note_service.list_note_headers(folder_id)
+        
+        assert len(headers) == 1
+        assert headers[0].id == note.id
+        assert headers[0].title == "Listed"
+        assert not hasattr(headers[0], "body_enc")
+        
+        statement = note_service._listing_statement(folder_id, columns=headers[0]._fields)
+        assert "body_enc" not in str(statement)
+    
+    def test_iter_notes_pages(self, note_service):
+        """Test streaming visits every note once in (updated_at, id) order."""
+        created = [
+            note_service.create_note(f"Note {i}", f"<p>{i}</p>") for i in range(7)
+        ]
+        
+        streamed = list(note_service.iter_notes(page_size=3))
+        
+        assert sorted(note.id for note, _ in streamed) == sorted(n.id for n in created)
+        keys = [(note.updated_at, note.id.hex) for note, _ in streamed]
+        assert keys == sorted(keys)
+        bodies = {note.id: body for note, body in streamed}
+        assert bodies[created[4].id] == "<p>4</p>"
+    
+    def test_bulk_create_update_delete(self, note_service):
+        """Test batch variants in single transactions."""
+        ids = note_service.create_notes(
+            {"title": f"Bulk {i}", "body": f"<p>{i}</p>"} for i in range(5)
+        )
+        assert len(ids) == 5
+        assert note_service.get_note(ids[3])[1] == "<p>3</p>"
+        
+        updated = note_service.update_notes([
+            {"id": ids[0], "title": "Renamed"},
+            {"id": ids[1], "body": "<p>New</p>"},
+            {"id": uuid4(), "title": "Missing"},
+        ])
+        assert updated == [ids[0], ids[1]]
+        assert note_service.get_note(ids[0])[0].title == "Renamed"
+        assert note_service.get_note(ids[1])[1] == "<p>New</p>"
+        
+        assert note_service.delete_notes(ids[:2]) == 2
+        assert note_service.get_note(ids[0]) is None
+        assert note_service.get_note(ids[2]) is not None
+    
+    def test_bulk_move_and_pin(self, note_service):
+        """Test bulk folder moves and pinning."""
+        ids = note_service.create_notes(
+            {"title": f"Note {i}", "body": ""} for i in range(3)
+        )
+        folder_id = uuid4()
+        
+        assert note_service.move_notes(ids[:2], folder_id) == 2
+        assert note_service.set_notes_pinned(ids[1:], True) == 2
+        
+        headers = note_service.list_note_headers(folder_id)
+        assert {h.id for h in headers} == set(ids[:2])
+        assert headers[0].id == ids[1] and headers[0].pinned
+    
+    def test_update_note_unchanged_is_noop(self, note_service):
+        """Test saving identical content does not rewrite the note."""
+        note = note_service.create_note("Same", "<p>Same</p>", pinned=True)
+        
+        updated = note_service.update_note(note.id, title="Same", body="<p>Same</p>", pinned=True)
+        
+        assert updated.updated_at == note.updated_at
+        assert note_service.get_note(note.id)[0].body_enc == note.body_enc
+        
+        retitled = note_service.update_note(note.id, title="Changed", body="<p>Same</p>")
+        assert retitled.title == "Changed"
+        assert note_service.get_note(note.id)[0].body_enc == note.body_enc
+        assert retitled.updated_at > note.updated_at
+        assert "body_enc" not in retitled.__dict__  # Never loaded
+    
+    def test_update_notes_skips_unchanged(self, note_service):
+        """Test bulk updates only write notes that changed."""
+        same = note_service.create_note("Same", "<p>a</p>")
+        changed = note_service.create_note("Changed", "<p>b</p>")
+        
+        ids = note_service.update_notes([
+            {"id": same.id, "title": "Same", "body": "<p>a</p>"},
+            {"id": changed.id, "title": "Changed", "body": "<p>c</p>"},
+        ])
+        
+        assert ids == [same.id, changed.id]
+        assert note_service.get_note(same.id)[0].updated_at == same.updated_at
+        result, body = note_service.get_note(changed.id)
+        assert body == "<p>c</p>"
+        assert result.updated_at > changed.updated_at
+    
+    def test_update_notes_survives_concurrent_delete(self, note_service, monkeypatch):
+        """Test a note deleted mid-update is skipped and the rest are written."""
+        kept = note_service.create_note("Kept", "<p>a</p>")
+        gone = note_service.create_note("Gone", "<p>b</p>")
+        changed_values = note_service._changed_values
+        
+        def delete_then_compare(current, fields):
+            # Runs after the current rows were read, before the write
+            note_service.delete_notes([gone.id])
+            return changed_values(current, fields)
+        
+        monkeypatch.setattr(note_service, "_changed_values", delete_then_compare)
+        ids = note_service.update_notes([
+            {"id": kept.id, "title": "Kept", "body": "<p>new</p>"},
+            {"id": gone.id, "title": "Renamed", "body": "<p>new</p>"},
+        ])
+        
+        assert ids == [kept.id]
+        assert note_service.get_note(kept.id)[1] == "<p>new</p>"
+        assert note_service.get_note(gone.id) is None
+        assert [n.id for n, _, _ in note_service.search_notes("renamed")] == []
+    
+    def test_repeated_open_uses_cache(self, note_service, monkeypatch):
+        """Test reopening a note skips decryption until it changes or is deleted."""
+        note = note_service.create_note("Cached", "<p>v1</p>")
+        assert note_service.get_note(note.id)[1] == "<p>v1</p>"
+        
+        decrypt = encryption_service.decrypt
+        calls = []
+        
+        def counting_decrypt(encrypted):
+            calls.append(encrypted)
+            return decrypt(encrypted)
+        
+        monkeypatch.setattr(encryption_service, "decrypt", counting_decrypt)
+        assert note_service.get_note(note.id)[1] == "<p>v1</p>"
+        assert calls == []
+        
+        note_service.update_note(note.id, body="<p>v2</p>")
+        assert note.id not in encryption_service.body_cache._entries
+        assert note_service.get_note(note.id)[1] == "<p>v2</p>"
+        assert len(calls) == 1
+        
+        note_service.delete_note(note.id)
+        assert note.id not in encryption_service.body_cache._entries
@@ -0,0 +1,199 @@
+"""Test in-memory search index."""
+
+import json
+import pytest
+from uuid import uuid4
+from src.aurora_notes.services import search_index
+from src.aurora_notes.services.search_index import SearchIndex
+
+
+def candidate_ids(index, query):
+    """Return candidate note ids for a query as a set."""
+    return {note_id for note_id, _, _ in index.candidates(query)}
+
+
+class TestSearchIndex:
+    """Test candidate filtering and incremental maintenance."""
+    
+    def test_token_prefix_and_typo_matching(self):
+        """Test words match by prefix and with small typos."""
+        index = SearchIndex()
+        python, groceries = uuid4(), uuid4()
+        index.add(python, "Python Tutorial", "Learn the basics")
+        index.add(groceries, "Shopping", "Groceries: milk, eggs")
+        
+        assert candidate_ids(index, "pyth") == {python}
+        assert candidate_ids(index, "grocerys") == {groceries}
+        assert candidate_ids(index, "python basics") == {python}
+        assert candidate_ids(index, "python milk") == set()
+        assert candidate_ids(index, "a") == {python, groceries}
+    
+    def test_update_and_remove(self):
+        """Test re-indexing replaces old tokens and removal cleans up."""
+        index = SearchIndex()
+        note_id = uuid4()
+        index.add(note_id, "Draft", "first version")
+        
+        index.update(note_id, text="second revision")
+        assert candidate_ids(index, "first") == set()
+        assert candidate_ids(index, "revision") == {note_id}
+        assert candidate_ids(index, "draft") == {note_id}
+        
+        index.update(note_id, title="Final")
+        assert index.candidates("final") == [(note_id, "Final", "second revision")]
+        
+        index.remove(note_id)
+        assert len(index) == 0
+        assert not index._postings and not index._vocabulary
+    
+    def test_partial_update_of_unknown_note_skipped(self):
+        """Test a title-only update before the note is loaded is ignored."""
+        index = SearchIndex()
+        note_id = uuid4()
+        
+        index.update(note_id, title="Orphan")
+        assert note_id not in index
+        
+        index.load([(note_id, "Loaded", "text")])
+        assert index.ready
+        assert candidate_ids(index, "loaded") == {note_id}
+    
+    @pytest.mark.parametrize("numpy", [None, search_index.numpy])
+    def test_search_scores_and_limits(self, monkeypatch, numpy):
+        """Test batch scoring matches per-note scoring, best first, top-k."""
+        monkeypatch.setattr(search_index, "numpy", numpy)
+        index = SearchIndex()
+        title_hit, text_hit, weak = uuid4(), uuid4(), uuid4()
+        index.add(title_hit, "Python Tutorial", "Learn the basics")
+        index.add(text_hit, "Notes", "Some Python, snakes and more")
+        index.add(weak, "Gardening", "Tomatoes")
+        
+        results = index.search("python")
+        
+        assert [note_id for note_id, _, _ in results] == [title_hit, text_hit]
+        assert results[0] == (title_hit, "Learn the basics", 100.0)
+        assert results[1][2] == 80.0
+        assert index.search("python", limit=1) == results[:1]
+        assert index.search("zzzz") == []
+    
+    def test_equal_scores_ordered_by_id(self):
+        """Test ties come back in note id order, with and without a limit."""
+        index = SearchIndex()
+        note_ids = [uuid4() for _ in range(5)]
+        index.load((note_id, "Meeting", "") for note_id in note_ids)
+        
+        assert [note_id for note_id, _, _ in index.search("meeting")] == sorted(note_ids)
+        assert [note_id for note_id, _, _ in index.search("meeting", limit=2)] == sorted(
+            note_ids
+        )[:2]
+    
+    @pytest.mark.parametrize("numpy", [None, search_index.numpy])
+    def test_search_cancelled_between_batches(self, monkeypatch, numpy):
+        """Test scoring stops at the next batch once cancelled."""
+        monkeypatch.setattr(search_index, "numpy", numpy)
+        monkeypatch.setattr(SearchIndex, "SCORE_BATCH", 2)
+        index = SearchIndex()
+        index.load((uuid4(), f"Python {i}", "") for i in range(5))
+        assert len(index.search("python")) == 5
+        
+        checks = []
+        
+        def cancelled():
+            checks.append(None)
+            return len(checks) > 1
+        
+        assert index.search("python", cancelled=cancelled) == []
+        # One title batch scored, then stops before titles 3-4, before texts, at the end
+        assert len(checks) == 4
+    
+    def test_added_words_refine_cached_candidates(self):
+        """Test queries adding words filter cached candidates until a change."""
+        index = SearchIndex()
+        meeting, meat = uuid4(), uuid4()
+        index.add(meeting, "Meeting notes", "agenda")
+        index.add(meat, "Meat notes", "recipe")
+        
+        assert candidate_ids(index, "notes") == {meeting, meat}
+        
+        # Refinement only filters the cached candidates; postings are unused
+        postings = index._postings
+        index._postings = {}
+        assert candidate_ids(index, "notes agenda") == {meeting}
+        assert [note_id for note_id, _, _ in index.search("notes agenda")] == [meeting]
+        index._postings = postings
+        
+        # Any change to the index drops cached queries
+        later = uuid4()
+        index.add(later, "Agenda notes", "slides")
+        assert not index._query_cache
+        assert candidate_ids(index, "notes agenda") == {meeting, later}
+    
+    def test_longer_token_refined_from_prefix(self, monkeypatch):
+        """Test typing a word refines the prefix's candidates to the same result."""
+        documents = [
+            (uuid4(), "Greeting cards", "budget"),
+            (uuid4(), "Meat pie", "budgie"),
+            (uuid4(), "Meeting", "budget review"),
+            (uuid4(), "Budget", "meetings"),
+        ]
+        typed = "meeting budget"
+        
+        for restored in (False, True):
+            index = SearchIndex()
+            index.load(documents)
+            if restored:
+                data = index.snapshot()
+                index = SearchIndex()
+                index.restore(data)
+            
+            fresh = {}
+            for end in range(1, len(typed) + 1):
+                index._query_cache.clear()
+                fresh[end] = candidate_ids(index, typed[:end])
+            
+            refined = []
+            refine_prefix = index._refine_prefix
+            monkeypatch.setattr(
+                index, "_refine_prefix",
+                lambda *args: refined.append(args[-1]) or refine_prefix(*args)
+            )
+            index._query_cache.clear()
+            for end in range(1, len(typed) + 1):
+                assert candidate_ids(index, typed[:end]) == fresh[end]
+            assert refined == [
+                "mee", "meet", "meeti", "meetin", "meeting",
+                "bud", "budg", "budge", "budget",
+            ]
+    
+    def test_query_cache_bounded(self):
+        """Test the query cache evicts least recently used entries."""
+        index = SearchIndex()
+        index.MAX_CACHED_QUERIES = 3
+        index.add(uuid4(), "Title", "alpha beta gamma delta")
+        
+        for query in ("alpha", "beta", "gamma", "delta"):
+            index.candidates(query)
+        
+        assert list(index._query_cache) == [
+            frozenset({"beta"}), frozenset({"gamma"}), frozenset({"delta"})
+        ]
+    
+    def test_snapshot_round_trip(self):
+        """Test a restored index answers queries and updates like the original."""
+        index = SearchIndex()
+        first, second = uuid4(), uuid4()
+        index.load([(first, "Groceries", "milk eggs"), (second, "Garden", "roses")])
+        index.change_seq = 7
+        data = index.snapshot()
+        assert not index.modified
+        
+        restored = SearchIndex()
+        restored.restore(json.loads(json.dumps(data)))
+        assert restored.ready and restored.change_seq == 7
+        assert candidate_ids(restored, "egs") == {first}
+        
+        restored.remove(first)
+        restored.add(uuid4(), "Chores", "buy milk")
+        assert restored.modified
+        assert [title for _, title, _ in restored.candidates("milk")] == ["Chores"]
+        assert "eggs" not in restored._postings
@@ -0,0 +1,132 @@
+"""Test background search worker."""
+
+import threading
+import pytest
+from src.aurora_notes.services.search_worker import SearchWorker
+
+
+@pytest.fixture
+def worker(note_service):
+    """Search worker streaming small batches."""
+    service = SearchWorker(note_service)
+    service.BATCH_SIZE = 2
+    yield service
+    service.stop(timeout=5)
+
+
+class TestSearchWorker:
+    """Test streaming and cancellation."""
+    
+    def test_streams_ranked_batches(self, note_service, worker, qtbot):
+        """Test results arrive in ranked batches followed by a final signal."""
+        note_service.create_notes(
+            {"title": f"Meeting {i}", "body": "<p>agenda</p>"} for i in range(5)
+        )
+        received = []
+        worker.resultsReady.connect(lambda *args: received.append(args))
+        
+        generation = worker.search("meeting")
+        qtbot.waitUntil(lambda: bool(received) and received[-1][2], timeout=5000)
+        
+        assert [len(batch) for _, batch, _ in received] == [2, 2, 1, 0]
+        assert all(gen == generation for gen, _, _ in received)
+        scores = [score for _, batch, _ in received for _, _, score in batch]
+        assert scores == sorted(scores, reverse=True)
+    
+    def test_pages_results(self, note_service, worker, qtbot):
+        """Test a search returns one page and the next starts at an offset."""
+        note_service.create_notes(
+            {"title": f"Meeting {i}", "body": ""} for i in range(5)
+        )
+        worker.PAGE_SIZE = 3
+        received, more = [], []
+        worker.resultsReady.connect(lambda *args: received.append(args))
+        worker.moreAvailable.connect(more.append)
+        
+        generation = worker.search("meeting")
+        qtbot.waitUntil(lambda: bool(received) and received[-1][2], timeout=5000)
+        first = [note.title for _, batch, _ in received for note, _, _ in batch]
+        assert len(first) == 3
+        assert more == [generation]
+        
+        received.clear()
+        worker.search("meeting", offset=3)
+        qtbot.waitUntil(lambda: bool(received) and received[-1][2], timeout=5000)
+        rest = [note.title for _, batch, _ in received for note, _, _ in batch]
+        assert sorted(first + rest) == [f"Meeting {i}" for i in range(5)]
+        assert more == [generation]
+    
+    def test_new_query_cancels_running_one(self, note_service, worker, monkeypatch, qtbot):
+        """Test a superseded search stops and emits nothing."""
+        note_service.create_notes(
+            {"title": f"Alpha {i}", "body": ""} for i in range(5)
+        )
+        note_service.create_note("Beta", "")
+        
+        started, release = threading.Event(), threading.Event()
+        iter_search_results = note_service.iter_search_results
+        
+        def slow_results(query, *args, **kwargs):
+            for batch in iter_search_results(query, *args, **kwargs):
+                if query == "alpha":
+                    started.set()
+                    release.wait(5)
+                yield batch
+        
+        monkeypatch.setattr(note_service, "iter_search_results", slow_results)
+        received = []
+        worker.resultsReady.connect(lambda *args: received.append(args))
+        
+        worker.search("alpha")
+        assert started.wait(5)
+        generation = worker.search("beta")
+        release.set()
+        qtbot.waitUntil(lambda: bool(received) and received[-1][2], timeout=5000)
+        
+        assert {gen for gen, _, _ in received} == {generation}
+        assert [note.title for _, batch, _ in received for note, _, _ in batch] == ["Beta"]
+    
+    def test_new_query_cancels_scoring(self, note_service, worker, monkeypatch, qtbot):
+        """Test a search superseded while scoring sees it is cancelled."""
+        note_service.create_note("Alpha", "")
+        note_service.create_note("Beta", "")
+        note_service.build_search_index()
+        
+        started, release = threading.Event(), threading.Event()
+        cancelled_seen = []
+        search = note_service.search_index.search
+        
+        def slow_search(query, limit=None, cancelled=None):
+            if query == "alpha":
+                started.set()
+                release.wait(5)
+                cancelled_seen.append(cancelled())
+            return search(query, limit, cancelled)
+        
+        monkeypatch.setattr(note_service.search_index, "search", slow_search)
+        received = []
+        worker.resultsReady.connect(lambda *args: received.append(args))
+        
+        worker.search("alpha")
+        assert started.wait(5)
+        generation = worker.search("beta")
+        release.set()
+        qtbot.waitUntil(lambda: bool(received) and received[-1][2], timeout=5000)
+        
+        assert cancelled_seen == [True]
+        assert {gen for gen, _, _ in received} == {generation}
+    
+    def test_failure_reported(self, note_service, worker, monkeypatch, qtbot):
+        """Test a failing search emits searchFailed for its generation."""
+        def failing_results(query, *args, **kwargs):
+            raise RuntimeError("broken")
+            yield
+        
+        monkeypatch.setattr(note_service, "iter_search_results", failing_results)
+        failures = []
+        worker.searchFailed.connect(lambda *args: failures.append(args))
+        
+        generation = worker.search("alpha")
+        qtbot.waitUntil(lambda: bool(failures), timeout=5000)
+        
+        assert failures == [(generation, "broken")]